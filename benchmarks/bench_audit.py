@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Password Audit Benchmark
+Passwords per second for check_password_strength in a loop and for the
+streaming audit, on a generated dump
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from password_audit import audit_file  # noqa: E402
+from password_creator import PasswordCreator  # noqa: E402
+
+ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*()_+-=[]{}|;:,.<>? "
+
+
+def write_dump(path: str, count: int, seed: int = 0):
+    """A dump of count passwords, 4-20 characters, with a few non-ASCII ones"""
+    rnd = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            password = "".join(rnd.choices(ALPHABET, k=rnd.randint(4, 20)))
+            f.write(password + ("é" if i % 1000 == 0 else "") + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark password auditing throughput")
+    parser.add_argument("-n", "--count", type=int, default=1_000_000,
+                       help="Passwords in the generated dump (default: 1000000)")
+    parser.add_argument("--baseline-count", type=int, default=100_000,
+                       help="Passwords for the check_password_strength loop (default: 100000)")
+    parser.add_argument("--workers", type=str, default="",
+                       help="Comma-separated worker counts (default: 1 and every CPU)")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    workers = [int(w) for w in args.workers.split(",") if w] or sorted({1, cpus})
+    fd, path = tempfile.mkstemp(prefix="audit-", suffix=".txt")
+    os.close(fd)
+    rows = []
+    try:
+        write_dump(path, args.count)
+
+        creator = PasswordCreator()
+        with open(path, encoding="utf-8") as f, open(os.devnull, "w") as sink:
+            start = time.perf_counter()
+            for i, line in enumerate(f):
+                if i == args.baseline_count:
+                    break
+                sink.write(json.dumps(creator.check_password_strength(line.rstrip("\n"))) + "\n")
+            rows.append(("check_password_strength + json", i, time.perf_counter() - start))
+
+        with open(os.devnull, "wb") as sink:
+            for n in workers:
+                start = time.perf_counter()
+                summary = audit_file(path, sink, workers=n)
+                rows.append((f"audit_file, {n} worker(s)", sum(summary.joint.values()), time.perf_counter() - start))
+            start = time.perf_counter()
+            summary = audit_file(path, workers=workers[-1])
+            rows.append((f"summary only, {workers[-1]} worker(s)", sum(summary.joint.values()), time.perf_counter() - start))
+    finally:
+        os.unlink(path)
+
+    baseline = rows[0][1] / rows[0][2]
+    print(f"{'method':<34}{'passwords':>12}{'seconds':>10}{'per second':>14}{'speedup':>10}")
+    print("-" * 80)
+    for name, count, elapsed in rows:
+        per_second = count / elapsed
+        print(f"{name:<34}{count:>12,}{elapsed:>10.2f}{per_second:>14,.0f}{per_second / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Extractor Benchmark
+Compares the HTML extraction backends on the saved fixture pages
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import AsyncIterator, Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractors import ExtractionPool, available_extractors, get_extractor  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def time_call(fn: Callable[[], object], repeat: int) -> List[float]:
+    """Run fn repeatedly and return the wall time of each run in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def _chunks(body: bytes, size: int = 65536) -> AsyncIterator[bytes]:
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction backends")
+    parser.add_argument("-n", "--repeat", type=int, default=5,
+                       help="Runs per backend and page (default: 5)")
+    parser.add_argument("--max-chars", type=int, default=10000,
+                       help="Text needed before streaming extraction stops (default: 10000)")
+    parser.add_argument("--fixtures", type=str, default=FIXTURES_DIR,
+                       help="Directory of .html pages to parse")
+    args = parser.parse_args()
+
+    pages = sorted(f for f in os.listdir(args.fixtures) if f.endswith(".html"))
+    backends = available_extractors()
+    print(f"Backends: {', '.join(backends)}")
+    print(f"{'page':<28}{'KB':>7}  {'backend':<14}{'full ms':>9}{'stream ms':>11}{'chars':>9}")
+    print("-" * 78)
+
+    for page in pages:
+        with open(os.path.join(args.fixtures, page), "rb") as f:
+            body = f.read()
+        html = body.decode("utf-8")
+
+        for name in backends:
+            extractor = get_extractor(name)
+            pool = ExtractionPool(extractor, workers=0)
+            text = extractor.extract(html)
+            full = time_call(lambda: extractor.extract(html), args.repeat)
+            stream = time_call(
+                lambda: asyncio.run(
+                    pool.extract_streaming(_chunks(body), "utf-8", args.max_chars, len(body))
+                ),
+                args.repeat,
+            )
+            print(f"{page:<28}{len(body) / 1024:>7.0f}  {name:<14}"
+                  f"{statistics.median(full):>9.2f}{statistics.median(stream):>11.2f}{len(text):>9}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
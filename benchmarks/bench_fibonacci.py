@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Fibonacci Benchmark
+Time and peak memory to get the n-th term from calculate_fibonacci's list,
+from fast doubling (with and without the memo cache, cold and with n - 1
+cached), and by streaming
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random_script  # noqa: E402
+from random_script import calculate_fibonacci, fibonacci, iter_fibonacci  # noqa: E402
+
+
+def measure(fn: Callable[[], Any]) -> Tuple[Any, float, float]:
+    """Result, wall time in milliseconds and peak traced memory in MB of one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def last_streamed(n: int) -> int:
+    return deque(iter_fibonacci(n + 1), maxlen=1)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Fibonacci implementations")
+    parser.add_argument("--sizes", type=str, default="1000,10000,50000,1000000",
+                       help="Comma-separated term indices n (default: 1000,10000,50000,1000000)")
+    parser.add_argument("--list-max", type=int, default=50000,
+                       help="Largest n for the list-building and streaming runs; their cost grows "
+                            "quadratically (default: 50000)")
+    args = parser.parse_args()
+
+    print(f"{'method':<34}{'n':>10}{'ms':>12}{'peak MB':>10}")
+    print("-" * 66)
+    for n in (int(size) for size in args.sizes.split(",") if size):
+        expected = fibonacci(n)
+        memo = random_script._fib_memo
+        # (name, setup run untimed before the call, timed call)
+        runs = []
+        if n <= args.list_max:
+            runs.append(("calculate_fibonacci(n + 1)[-1]", None, lambda: calculate_fibonacci(n + 1)[-1]))
+            runs.append(("iter_fibonacci, last term", None, lambda: last_streamed(n)))
+        runs.append(("fibonacci(n)", None, lambda: fibonacci(n)))
+        runs.append(("fibonacci(n, memo=True), cold", memo.clear, lambda: fibonacci(n, memo=True)))
+        if n > 0:
+            runs.append(("fibonacci(n, memo=True) after n-1",
+                         lambda: (memo.clear(), fibonacci(n - 1, memo=True)),
+                         lambda: fibonacci(n, memo=True)))
+
+        for name, setup, fn in runs:
+            if setup is not None:
+                setup()
+            # Checked after timing, so the check cannot warm the cache for the timed call
+            result, elapsed, peak = measure(fn)
+            assert result == expected, name
+            print(f"{name:<34}{n:>10,}{elapsed:>12.2f}{peak:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+get_docs Benchmark
+Drives the MCP tools against a local fake Serper endpoint and a local docs
+server, so throughput and latency can be compared between runs offline
+"""
+
+import argparse
+import asyncio
+import hashlib
+import http.server
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+sys.path.insert(0, ROOT_DIR)
+
+
+def load_pages(fixtures: str, page_kb: int) -> Dict[str, bytes]:
+    """Read the recorded pages, repeated or truncated to page_kb if given"""
+    pages = {}
+    for name in sorted(f for f in os.listdir(fixtures) if f.endswith(".html")):
+        with open(os.path.join(fixtures, name), "rb") as f:
+            body = f.read()
+        if page_kb:
+            size = page_kb * 1024
+            body = (body * (size // len(body) + 1))[:size]
+        pages[name[:-len(".html")]] = body
+    return pages
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Answers Serper searches (POST) and serves docs pages (GET)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        query = json.loads(self.rfile.read(length)).get("q", "")
+        time.sleep(server.serper_latency)
+
+        # Each query maps to a stable set of pages so repeated runs fetch the same URLs
+        digest = int(hashlib.sha1(query.encode("utf-8")).hexdigest(), 16)
+        names = sorted(server.pages)
+        base = f"http://127.0.0.1:{server.server_port}"
+        organic = []
+        for i in range(server.results):
+            name = names[(digest + i) % len(names)]
+            page = (digest // 7 + i) % server.site_pages
+            organic.append({
+                "title": f"{name} {page}",
+                "link": f"{base}/{name}/{page}",
+                "snippet": f"Result {i + 1} for {query}",
+            })
+        self._reply(200, json.dumps({"organic": organic}).encode("utf-8"), "application/json")
+
+    def do_GET(self):
+        server = self.server
+        name = self.path.strip("/").split("/")[0]
+        body = server.pages.get(name)
+        time.sleep(server.latency)
+        if body is None:
+            self._reply(404, b"not found", "text/plain")
+            return
+        etag = f'"{hashlib.sha1(self.path.encode("utf-8")).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._reply(304, b"", "text/html", etag)
+            return
+        self._reply(200, body, "text/html; charset=utf-8", etag)
+
+    def _reply(self, status: int, body: bytes, content_type: str, etag: Optional[str] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading after it had enough text
+            return
+        with self.server.bytes_sent.get_lock():
+            self.server.bytes_sent.value += len(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def run_stand_in(conn, bytes_sent, options: Dict[str, Any]) -> None:
+    """Serve the stand-in endpoints in a child process until terminated"""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.pages = load_pages(options["fixtures"], options["page_kb"])
+    server.latency = options["latency"]
+    server.serper_latency = options["serper_latency"]
+    server.site_pages = options["site_pages"]
+    server.results = options["results"]
+    server.bytes_sent = bytes_sent
+    conn.send(server.server_port)
+    server.serve_forever()
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+
+    def pick(q: float) -> float:
+        return round(1000 * ordered[min(int(q * len(ordered)), len(ordered) - 1)], 3)
+
+    return {
+        "mean_ms": round(1000 * statistics.fmean(ordered), 3),
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(1000 * ordered[-1], 3),
+    }
+
+
+def output_chars(result: Any) -> int:
+    """Characters of text in a FastMCP call_tool result"""
+    if isinstance(result, tuple):
+        result = result[0]
+    return sum(len(getattr(block, "text", "")) for block in result)
+
+
+async def run_scenario(server,
+                       tool: str,
+                       requests: int,
+                       concurrency: int,
+                       queries: int,
+                       libraries: List[str],
+                       bytes_sent) -> Dict[str, Any]:
+    """
+    Call one tool `requests` times from `concurrency` workers
+
+    Returns:
+        Throughput, latency percentiles, error count and bytes transferred
+    """
+    calls = []
+    for i in range(requests):
+        if tool == "get_docs":
+            arguments = {"query": f"topic {i % queries}", "library": libraries[i % len(libraries)]}
+        else:
+            arguments = {}
+        calls.append(arguments)
+
+    latencies: List[float] = []
+    errors = 0
+    chars = 0
+    next_call = iter(calls)
+
+    async def worker():
+        nonlocal errors, chars
+        for arguments in next_call:
+            start = time.perf_counter()
+            try:
+                result = await server.call_tool(tool, arguments)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            chars += output_chars(result)
+
+    sent_before = bytes_sent.value
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "tool": tool,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency": percentiles(latencies),
+        "bytes_received": bytes_sent.value - sent_before,
+        "output_chars": chars,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def run_benchmarks(args: argparse.Namespace, bytes_sent) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    import logging
+    import main as docs_server
+
+    # Per-request INFO logs would dominate the measurement
+    logging.getLogger().setLevel(logging.WARNING)
+    libraries = args.libraries or list(docs_server.docs_urls)
+
+    results = []
+    async with docs_server.app_lifespan(docs_server.mcp):
+        for tool in args.tools:
+            if args.warmup:
+                await run_scenario(docs_server.mcp, tool, args.warmup, args.concurrency,
+                                   args.queries, libraries, bytes_sent)
+            result = await run_scenario(docs_server.mcp, tool, args.requests, args.concurrency,
+                                        args.queries, libraries, bytes_sent)
+            result["peak_rss_mb"] = peak_rss_mb()
+            results.append(result)
+        components = docs_server.component_stats()
+    return results, components
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the docs MCP tools against local stand-in servers")
+    parser.add_argument("-n", "--requests", type=int, default=200,
+                       help="Measured calls per tool (default: 200)")
+    parser.add_argument("-c", "--concurrency", type=int, default=10,
+                       help="Concurrent callers (default: 10)")
+    parser.add_argument("--warmup", type=int, default=0,
+                       help="Unmeasured calls per tool before the run (default: 0)")
+    parser.add_argument("--tools", type=str, default="get_docs,list_supported_libraries",
+                       help="Comma-separated tools to drive (default: get_docs,list_supported_libraries)")
+    parser.add_argument("--queries", type=int, default=50,
+                       help="Distinct get_docs queries; fewer means more cache hits (default: 50)")
+    parser.add_argument("--libraries", type=str, default="",
+                       help="Comma-separated libraries to query (default: all)")
+    parser.add_argument("--latency", type=float, default=0.02,
+                       help="Docs server delay per page in seconds (default: 0.02)")
+    parser.add_argument("--serper-latency", type=float, default=0.05,
+                       help="Fake Serper delay per search in seconds (default: 0.05)")
+    parser.add_argument("--page-kb", type=int, default=0,
+                       help="Resize every served page to this many KB (default: fixture size)")
+    parser.add_argument("--site-pages", type=int, default=20,
+                       help="Distinct URLs per fixture page (default: 20)")
+    parser.add_argument("--cache", choices=["cold", "warm"], default="cold",
+                       help="cold disables the search and page caches; warm uses fresh "
+                            "ones in a temporary directory (default: cold)")
+    parser.add_argument("--fixtures", type=str, default=FIXTURES_DIR,
+                       help="Directory of recorded .html pages to serve")
+    parser.add_argument("-o", "--output", type=str, default="",
+                       help="JSON results file (default: benchmarks/results/get_docs-<time>.json)")
+    args = parser.parse_args()
+    args.tools = [t.strip() for t in args.tools.split(",") if t.strip()]
+    args.libraries = [lib.strip() for lib in args.libraries.split(",") if lib.strip()]
+
+    bytes_sent = multiprocessing.Value("q", 0)
+    parent_conn, child_conn = multiprocessing.Pipe()
+    stand_in = multiprocessing.Process(target=run_stand_in, daemon=True, args=(child_conn, bytes_sent, {
+        "fixtures": args.fixtures,
+        "page_kb": args.page_kb,
+        "latency": args.latency,
+        "serper_latency": args.serper_latency,
+        "site_pages": args.site_pages,
+        "results": 3,
+    }))
+    stand_in.start()
+    port = parent_conn.recv()
+
+    cache_dir = tempfile.mkdtemp(prefix="docs-bench-")
+    # Point the server at the stand-ins before main.py reads its configuration
+    os.environ.update({
+        "SERPER_URL": f"http://127.0.0.1:{port}/search",
+        "SERPER_API_KEY": "benchmark",
+        "DOCS_CACHE_DIR": cache_dir,
+        "DOCS_INDEX_PATH": os.path.join(cache_dir, "index.sqlite3"),
+        "DOCS_METRICS_FILE": "",
+    })
+    # Rate limits would measure the limiter instead of the server; keep any the caller set
+    for name in ("SERPER_RATE", "DOCS_HOST_RATE"):
+        os.environ.setdefault(name, "0")
+    if args.cache == "cold":
+        os.environ["DOCS_SEARCH_CACHE_TTL"] = "0"
+        os.environ["DOCS_PAGE_CACHE_MAX_MB"] = "0"
+
+    try:
+        results, components = asyncio.run(run_benchmarks(args, bytes_sent))
+    finally:
+        stand_in.terminate()
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+        "components": components,
+    }
+
+    print(f"{'tool':<26}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}"
+          f"{'MB in':>8}{'RSS MB':>8}")
+    print("-" * 86)
+    for r in results:
+        latency = r["latency"]
+        print(f"{r['tool']:<26}{r['requests_per_s']:>9.1f}{latency.get('p50_ms', 0):>9.1f}"
+              f"{latency.get('p95_ms', 0):>9.1f}{latency.get('p99_ms', 0):>9.1f}{r['errors']:>8}"
+              f"{r['bytes_received'] / 1e6:>8.1f}{r['peak_rss_mb']:>8.1f}")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"get_docs-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Password Generation Benchmark
+Passwords per second for the one-at-a-time generator and the bulk engine,
+and the same for passphrases
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from password_bulk import BulkGenerator, build_spec, stream_passwords  # noqa: E402
+from password_creator import PasswordCreator  # noqa: E402
+from wordlist import PassphraseGenerator, PassphraseOptions  # noqa: E402
+
+
+def rate(count: int, elapsed: float) -> float:
+    return count / elapsed if elapsed > 0 else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark password generation throughput")
+    parser.add_argument("-n", "--count", type=int, default=1_000_000,
+                       help="Passwords per bulk run (default: 1000000)")
+    parser.add_argument("--baseline-count", type=int, default=100_000,
+                       help="Passwords for the one-at-a-time generator (default: 100000)")
+    parser.add_argument("-l", "--length", type=int, default=12,
+                       help="Password length (default: 12)")
+    parser.add_argument("--workers", type=str, default="",
+                       help="Comma-separated worker counts for streamed runs (default: 1 and every CPU)")
+    parser.add_argument("--format", choices=["plain", "jsonl"], default="plain",
+                       help="Output format for streamed runs (default: plain)")
+    parser.add_argument("--wordlist", type=str,
+                       help="Wordlist index or plain list for the passphrase runs (default: built-in)")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    workers = [int(w) for w in args.workers.split(",") if w] or sorted({1, cpus})
+    spec = build_spec(length=args.length)
+    rows = []
+
+    creator = PasswordCreator()
+    start = time.perf_counter()
+    for _ in range(args.baseline_count):
+        creator.generate_password(length=args.length)
+    rows.append(("generate_password loop", args.baseline_count, time.perf_counter() - start))
+
+    generator = BulkGenerator(spec)
+    start = time.perf_counter()
+    generator.generate(args.count)
+    rows.append(("BulkGenerator.generate", args.count, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for _ in range(args.baseline_count):
+        creator.generate_passphrase(wordlist=args.wordlist)
+    rows.append(("generate_passphrase loop", args.baseline_count, time.perf_counter() - start))
+
+    passphrases = PassphraseGenerator(PassphraseOptions(wordlist=args.wordlist))
+    start = time.perf_counter()
+    passphrases.generate(args.count)
+    rows.append(("PassphraseGenerator.generate", args.count, time.perf_counter() - start))
+
+    with open(os.devnull, "wb") as sink:
+        for n in workers:
+            start = time.perf_counter()
+            stream_passwords(sink, spec, args.count, fmt=args.format, workers=n)
+            rows.append((f"stream {args.format}, {n} worker(s)", args.count, time.perf_counter() - start))
+
+    baseline = rate(rows[0][1], rows[0][2])
+    print(f"{'method':<34}{'count':>12}{'seconds':>10}{'per second':>14}{'speedup':>10}")
+    print("-" * 80)
+    for name, count, elapsed in rows:
+        per_second = rate(count, elapsed)
+        print(f"{name:<34}{count:>12,}{elapsed:>10.2f}{per_second:>14,.0f}{per_second / baseline:>9.1f}x")
+
+    # Worker processes must not repeat each other's (or the parent's) random bytes
+    check_count = min(args.count, 200_000)
+    check_workers = max(max(workers), 2)
+    buf = io.BytesIO()
+    chunk_size = max(check_count // (check_workers * 4), 1)
+    stream_passwords(buf, spec, check_count, workers=check_workers, chunk_size=chunk_size)
+    lines = buf.getvalue().splitlines()
+    duplicates = len(lines) - len(set(lines))
+    if duplicates:
+        print(f"\n❌ {duplicates:,} duplicates in {check_count:,} passwords from {check_workers} workers")
+        sys.exit(1)
+    print(f"\n✅ No duplicates in {check_count:,} passwords from {check_workers} workers")
+
+
+if __name__ == "__main__":
+    main()
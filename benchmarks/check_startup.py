@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Startup Budget Check
+Measures how long the stdio server takes to become usable and fails when
+it goes over budget, so a new eager import or slow startup step is caught
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_PATH = os.path.join(ROOT_DIR, "main.py")
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def own_import_times() -> Dict[str, float]:
+    """
+    Import cost of main.py on top of the MCP SDK, in milliseconds
+
+    The SDK is imported first so the numbers only cover this project's
+    modules and the dependencies they add.
+
+    Returns:
+        {"main": cumulative ms, <module>: cumulative ms, ...} for the modules main pulls in
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import mcp.server.fastmcp; import main"],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    lines = result.stderr.splitlines()
+    start = next(i for i, line in enumerate(lines) if line.rstrip().endswith("| mcp.server.fastmcp")) + 1
+    times = {}
+    for line in lines[start:]:
+        match = IMPORT_LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2)) / 1000
+    return times
+
+
+async def time_handshake(env: Dict[str, str]) -> Dict[str, float]:
+    """Spawn the server and time initialize and list_tools, in milliseconds"""
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=[MAIN_PATH], env=env, cwd=ROOT_DIR)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        async with stdio_client(params, errlog=devnull) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                initialized = time.perf_counter()
+                await session.list_tools()
+                listed = time.perf_counter()
+    return {
+        "initialize_ms": (initialized - start) * 1000,
+        "list_tools_ms": (listed - start) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check server import and startup time against a budget")
+    parser.add_argument("-n", "--repeat", type=int, default=5,
+                       help="Server starts to take the median of (default: 5)")
+    parser.add_argument("--import-budget-ms", type=float, default=60,
+                       help="Budget for importing main.py on top of the MCP SDK (default: 60)")
+    parser.add_argument("--startup-budget-ms", type=float, default=2000,
+                       help="Budget from spawning the server to a list_tools reply (default: 2000)")
+    args = parser.parse_args()
+
+    imports = own_import_times()
+    own = imports.get("main", 0.0)
+    print(f"main.py import on top of the MCP SDK: {own:.1f} ms")
+    slowest = sorted(((ms, name) for name, ms in imports.items() if name != "main"), reverse=True)[:5]
+    for ms, name in slowest:
+        print(f"  {name:<30}{ms:>8.1f} ms")
+
+    # Keep the server off the user's caches and network
+    env = dict(os.environ, DOCS_CACHE_DIR=tempfile.mkdtemp(prefix="docs-startup-"),
+               DOCS_WARMUP_CONNECT="false", DOCS_WARMUP_QUERIES="")
+    runs: List[Dict[str, float]] = [asyncio.run(time_handshake(env)) for _ in range(args.repeat)]
+    initialize = statistics.median(r["initialize_ms"] for r in runs)
+    listed = statistics.median(r["list_tools_ms"] for r in runs)
+    print(f"Spawn to initialize reply:  {initialize:.0f} ms (median of {args.repeat})")
+    print(f"Spawn to list_tools reply:  {listed:.0f} ms")
+
+    failures = []
+    if own > args.import_budget_ms:
+        failures.append(f"main.py import took {own:.1f} ms, budget {args.import_budget_ms:g} ms")
+    if listed > args.startup_budget_ms:
+        failures.append(f"startup took {listed:.0f} ms, budget {args.startup_budget_ms:g} ms")
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Breached Password Filter
+A compact on-disk Bloom filter of breached and common passwords
+
+The filter is built once from a local password list (one per line) and
+queried through a read-only memory map, so a lookup costs one hash and a few
+byte reads. Memory use is whatever pages the OS keeps cached, however large
+the list was. A Bloom filter never misses a listed password. It wrongly
+reports an unlisted one at the false-positive rate chosen at build time;
+about 1.44 * log2(1 / rate) bits per password, e.g. 1.8 bytes at 0.1%.
+"""
+
+import argparse
+import hashlib
+import math
+import mmap
+import struct
+import sys
+import time
+from typing import BinaryIO, Dict, Iterable, Optional
+
+MAGIC = b"PWBLOOM1"
+# magic, bits, hash count, passwords, false-positive rate
+HEADER = struct.Struct("<8sQIQd")
+
+DEFAULT_FP_RATE = 0.001
+
+# Input bytes read at a time when building
+READ_SIZE = 1 << 20
+
+
+def filter_size(count: int, fp_rate: float) -> Dict[str, int]:
+    """Optimal bit count and hash count for count passwords at fp_rate"""
+    if not 0 < fp_rate < 1:
+        raise ValueError("False-positive rate must be between 0 and 1")
+    count = max(count, 1)
+    bits = max(64, math.ceil(-count * math.log(fp_rate) / math.log(2) ** 2))
+    hashes = max(1, round(bits / count * math.log(2)))
+    return {"bits": bits, "hashes": hashes}
+
+
+def _hashes(password: bytes):
+    """Two independent 64-bit hashes; the k probe positions are h1 + i * h2"""
+    digest = hashlib.blake2b(password, digest_size=16).digest()
+    # An odd step never cycles early, whatever the bit count
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class BreachFilter:
+    """Read-only view of a filter file, queried with `password in filter`"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER.size:
+            raise ValueError(f"{path} is not a breached password filter")
+        magic, self.bits, self.hashes, self.count, self.fp_rate = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or len(self._mm) < HEADER.size + (self.bits + 7) // 8:
+            raise ValueError(f"{path} is not a breached password filter")
+
+    def __contains__(self, password: str) -> bool:
+        h1, h2 = _hashes(password.encode("utf-8", "surrogatepass"))
+        mm = self._mm
+        bits = self.bits
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % bits
+            if not mm[HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def close(self):
+        self._mm.close()
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "passwords": self.count,
+            "bits": self.bits,
+            "hashes": self.hashes,
+            "fp_rate": self.fp_rate,
+            "size_mb": round((HEADER.size + (self.bits + 7) // 8) / 1e6, 2),
+        }
+
+
+_open_filters: Dict[str, BreachFilter] = {}
+
+
+def open_filter(path: str) -> BreachFilter:
+    """Open a filter once per process; later calls reuse the same memory map"""
+    breach_filter = _open_filters.get(path)
+    if breach_filter is None:
+        breach_filter = _open_filters[path] = BreachFilter(path)
+    return breach_filter
+
+
+def _count_lines(source: BinaryIO) -> int:
+    count = 0
+    last = b"\n"
+    while True:
+        block = source.read(READ_SIZE)
+        if not block:
+            break
+        count += block.count(b"\n")
+        last = block
+    # A last line without a newline still counts
+    return count + (not last.endswith(b"\n"))
+
+
+def _lines(source: BinaryIO) -> Iterable[bytes]:
+    rest = b""
+    while True:
+        block = source.read(READ_SIZE)
+        if not block:
+            break
+        lines = (rest + block).split(b"\n")
+        rest = lines.pop()
+        yield from lines
+    if rest:
+        yield rest
+
+
+def build_filter(source_path: str, output_path: str, fp_rate: float = DEFAULT_FP_RATE,
+                 expected: Optional[int] = None) -> Dict[str, float]:
+    """
+    Build a filter file from a password list
+
+    The bit array is written through a memory map of the output file, so
+    the OS pages it out as needed instead of it all being held in memory.
+
+    Args:
+        source_path: Password list, one per line (UTF-8; blank lines skipped)
+        output_path: Filter file to write
+        fp_rate: Target false-positive rate
+        expected: Number of passwords, if known; counted from the list otherwise
+
+    Returns:
+        The filter's statistics (see BreachFilter.as_dict)
+    """
+    if expected is None:
+        with open(source_path, "rb") as source:
+            expected = _count_lines(source)
+    size = filter_size(expected, fp_rate)
+    bits, hashes = size["bits"], size["hashes"]
+    length = HEADER.size + (bits + 7) // 8
+
+    added = 0
+    with open(output_path, "wb+") as out:
+        out.truncate(length)
+        with mmap.mmap(out.fileno(), length) as mm, open(source_path, "rb") as source:
+            offset = HEADER.size
+            for line in _lines(source):
+                if line.endswith(b"\r"):
+                    line = line[:-1]
+                if not line:
+                    continue
+                h1, h2 = _hashes(line)
+                for i in range(hashes):
+                    position = (h1 + i * h2) % bits
+                    mm[offset + (position >> 3)] |= 1 << (position & 7)
+                added += 1
+            HEADER.pack_into(mm, 0, MAGIC, bits, hashes, added, fp_rate)
+            mm.flush()
+
+    breach_filter = BreachFilter(output_path)
+    stats = breach_filter.as_dict()
+    breach_filter.close()
+    return stats
+
+
+def main():
+    """Command line interface for building and querying filters"""
+    parser = argparse.ArgumentParser(description="Build or query a breached password filter")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    build = commands.add_parser("build", help="Build a filter from a password list")
+    build.add_argument("source", help="Password list, one per line")
+    build.add_argument("output", help="Filter file to write")
+    build.add_argument("--fp-rate", type=float, default=DEFAULT_FP_RATE,
+                      help=f"False-positive rate (default: {DEFAULT_FP_RATE})")
+    build.add_argument("--expected", type=int,
+                      help="Number of passwords in the list (default: count them first)")
+    
+    check = commands.add_parser("check", help="Look passwords up in a filter")
+    check.add_argument("filter", help="Filter file")
+    check.add_argument("passwords", nargs="+", help="Passwords to look up")
+    
+    args = parser.parse_args()
+    
+    if args.command == "build":
+        start = time.perf_counter()
+        try:
+            stats = build_filter(args.source, args.output, args.fp_rate, args.expected)
+        except ValueError as e:
+            parser.error(str(e))
+        elapsed = time.perf_counter() - start
+        print(f"✅ Built {args.output} in {elapsed:.1f}s")
+        print(f"  Passwords: {stats['passwords']:,}")
+        print(f"  Size: {stats['size_mb']} MB ({stats['hashes']} hashes, {stats['fp_rate']:g} false-positive rate)")
+        return
+    
+    breach_filter = open_filter(args.filter)
+    found = False
+    for password in args.passwords:
+        listed = password in breach_filter
+        found = found or listed
+        print(f"{'✗ listed    ' if listed else '✓ not listed'}  {password}")
+    sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
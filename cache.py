@@ -0,0 +1,283 @@
+"""
+Persistent caches for the documentation search server.
+
+SearchCache keeps Serper responses in a bounded in-memory LRU backed by a
+SQLite table, so repeated queries are answered without a paid API call,
+including across server restarts.
+
+PageCache keeps the extracted text of fetched pages together with their
+ETag/Last-Modified validators, so a repeat fetch is either served outright
+or revalidated with a conditional GET instead of downloaded and re-parsed.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so equivalent queries share a key"""
+    return " ".join(query.lower().split())
+
+
+class CacheStats:
+    """Hit/miss/eviction counters for a cache"""
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    """Open (creating if needed) a SQLite cache database"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SearchCache:
+    """Two-tier TTL cache for search results: in-memory LRU over SQLite"""
+
+    def __init__(self,
+                 path: str,
+                 ttl: float = 6 * 3600,
+                 max_memory_entries: int = 256,
+                 max_disk_entries: int = 10000):
+        """
+        Args:
+            path: SQLite database file
+            ttl: Seconds an entry stays valid
+            max_memory_entries: Size of the in-process LRU
+            max_disk_entries: Rows kept in the SQLite table
+        """
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.stats = CacheStats()
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._conn = open_database(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS search_cache_accessed ON search_cache(accessed_at)"
+        )
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a query, or None on a miss"""
+        key = normalize_query(query)
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return value
+            del self._memory[key]
+
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM search_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            value_json, expires_at = row
+            if expires_at > now:
+                self._conn.execute(
+                    "UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                value = json.loads(value_json)
+                self._remember(key, expires_at, value)
+                self.stats.disk_hits += 1
+                return value
+            self._conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+
+        self.stats.misses += 1
+        return None
+
+    def put(self, query: str, value: Dict[str, Any]) -> None:
+        """Store a result for a query"""
+        key = normalize_query(query)
+        now = time.time()
+        expires_at = now + self.ttl
+        self._remember(key, expires_at, value)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO search_cache (key, value, expires_at, accessed_at)"
+            " VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), expires_at, now),
+        )
+        self._evict_disk(now)
+
+    def _remember(self, key: str, expires_at: float, value: Dict[str, Any]) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _evict_disk(self, now: float) -> None:
+        expired = self._conn.execute(
+            "DELETE FROM search_cache WHERE expires_at <= ?", (now,)
+        ).rowcount
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM search_cache WHERE key IN"
+                " (SELECT key FROM search_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+        self.stats.evictions += max(expired, 0) + max(overflow, 0)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CachedPage(NamedTuple):
+    """Extracted page text and the validators needed to revalidate it"""
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers that turn a GET into a conditional GET for this page"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCacheStats:
+    """Counters for the page cache"""
+
+    def __init__(self):
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class PageCache:
+    """Size-bounded SQLite store of extracted page text with LRU eviction"""
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, fresh_for: float = 300.0):
+        """
+        Args:
+            path: SQLite database file
+            max_bytes: Total size of stored text before least recently used pages are evicted
+            fresh_for: Seconds after a fetch or revalidation during which a page is served
+                without contacting the origin
+        """
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        self.stats = PageCacheStats()
+        self._conn = open_database(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS page_cache ("
+            " url TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " fetched_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS page_cache_accessed ON page_cache(accessed_at)"
+        )
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Return the cached page for a URL, or None if it was never stored"""
+        row = self._conn.execute(
+            "SELECT text, etag, last_modified, fetched_at FROM page_cache WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        self._conn.execute(
+            "UPDATE page_cache SET accessed_at = ? WHERE url = ?", (time.time(), url)
+        )
+        return CachedPage(*row)
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        """Whether a page can be served without revalidation"""
+        return time.time() - page.fetched_at < self.fresh_for
+
+    def mark_hit(self) -> None:
+        self.stats.hits += 1
+
+    def mark_revalidated(self, url: str) -> None:
+        """Record a 304 response: the stored text is current again"""
+        self.stats.revalidated += 1
+        self._conn.execute(
+            "UPDATE page_cache SET fetched_at = ? WHERE url = ?", (time.time(), url)
+        )
+
+    def put(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Store the extracted text of a page"""
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO page_cache"
+            " (url, text, etag, last_modified, fetched_at, accessed_at, size)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, text, etag, last_modified, now, now, size),
+        )
+        self._evict()
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM page_cache").fetchone()
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for url, size in self._conn.execute(
+            "SELECT url, size FROM page_cache ORDER BY accessed_at"
+        ):
+            if total <= self.max_bytes:
+                break
+            victims.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM page_cache WHERE url = ?", victims)
+        self.stats.evictions += len(victims)
+
+    def close(self) -> None:
+        self._conn.close()
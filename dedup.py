@@ -0,0 +1,112 @@
+"""
+Duplicate suppression for search results.
+
+Search engines return the same documentation page under several URLs:
+versioned paths (/en/stable/ and /en/latest/), anchors, tracking query
+strings. canonical_url cleans a URL before it is fetched and url_identity
+maps such variants to one key. Pages that still turn out to be near-copies
+are caught after extraction by comparing SimHash fingerprints.
+"""
+
+import heapq
+import re
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "ref", "ref_src", "_ga", "mc_cid", "mc_eid"}
+TRACKING_PREFIXES = ("utm_",)
+
+# Path segments naming a docs version: stable, latest, 4.2, 2.1.0, 1.x, ...
+VERSION_SEGMENT = re.compile(r"^(stable|latest|current|dev|main|master|\d+\.(\d+|x)(\.\d+)*)$", re.IGNORECASE)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Fingerprints are built from word 3-grams, sampled to keep hashing cheap on large pages
+SHINGLE_WORDS = 3
+MAX_WORDS = 5000
+SAMPLE_SIZE = 512
+MIN_WORDS = 50
+
+_WORD = re.compile(r"\w+")
+_MASK = (1 << 64) - 1
+
+
+def canonical_url(url: str) -> str:
+    """
+    Clean a URL without changing the page it points to: lowercase scheme and
+    host, drop default ports, fragments and tracking parameters, and sort the
+    remaining query parameters
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        # IPv6 literal; urlsplit strips its brackets
+        host = f"[{host}]"
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(params), ""))
+
+
+def url_identity(url: str) -> str:
+    """
+    Key shared by URLs that serve the same document: the canonical URL with
+    version segments, index.html and trailing slashes folded away
+    """
+    parts = urlsplit(canonical_url(url))
+    segments = [
+        "*" if VERSION_SEGMENT.match(segment) else segment
+        for segment in parts.path.split("/")
+        if segment and segment not in ("index.html", "index.htm")
+    ]
+    return urlunsplit(("", parts.netloc, "/".join(segments), parts.query, ""))
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash of a text's word 3-grams
+
+    Only the SAMPLE_SIZE smallest shingle hashes take part (a bottom-k
+    sample), so the cost stays flat for large pages while near-identical
+    texts still draw near-identical samples.
+
+    Returns:
+        The fingerprint, or None for texts too short to compare meaningfully
+    """
+    # Words average well under 16 characters, so this prefix holds MAX_WORDS of them
+    words = _WORD.findall(text[:MAX_WORDS * 16].lower())[:MAX_WORDS]
+    if len(words) < MIN_WORDS:
+        return None
+    # hash() is salted per process, which is fine for fingerprints that are never stored
+    shingles = {hash(shingle) & _MASK for shingle in zip(*(words[i:] for i in range(SHINGLE_WORDS)))}
+    sample = heapq.nsmallest(SAMPLE_SIZE, shingles)
+
+    fingerprint = 0
+    half = len(sample) / 2
+    for bit in range(64):
+        # Sum of the masked hashes is the count of hashes with this bit set, shifted by bit
+        if sum(map((1 << bit).__and__, sample)) >> bit > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def find_near_duplicate(fingerprint: Optional[int], seen: List[Optional[int]], max_distance: int) -> Optional[int]:
+    """
+    Position in seen of a fingerprint within max_distance bits of this one,
+    or None if there is none (or the page could not be fingerprinted)
+    """
+    if fingerprint is None:
+        return None
+    for i, other in enumerate(seen):
+        if other is not None and hamming_distance(fingerprint, other) <= max_distance:
+            return i
+    return None
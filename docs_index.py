@@ -0,0 +1,337 @@
+"""
+Local full-text index over the documentation sites.
+
+DocsIndexer walks each site's sitemap and stores every page, split into
+heading-delimited sections, in a SQLite FTS5 table. Re-running it only
+downloads pages whose sitemap <lastmod>, ETag/Last-Modified or content have
+changed. DocsIndex answers BM25-ranked queries from that table with no
+network access.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import re
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import httpx
+
+from cache import open_database
+from extractors import extract_sections
+from resilience import UpstreamGuard, UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+# BM25 column weights: library, url, title, heading, body
+BM25_WEIGHTS = (0.0, 0.0, 4.0, 8.0, 1.0)
+
+
+class IndexHit(NamedTuple):
+    """One matching section from the local index"""
+    url: str
+    title: str
+    heading: str
+    snippet: str
+    score: float
+
+
+def fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query that matches any of its terms"""
+    terms = re.findall(r"\w+", query.lower())
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class DocsIndex:
+    """SQLite FTS5 index of documentation sections"""
+
+    def __init__(self, path: str):
+        self._conn = open_database(path)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY,"
+            " library TEXT NOT NULL,"
+            " lastmod TEXT,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " content_hash TEXT,"
+            " indexed_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS pages_library ON pages(library);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS sections USING fts5("
+            " library UNINDEXED, url UNINDEXED, title, heading, body,"
+            " tokenize='porter unicode61');"
+        )
+
+    def page(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stored metadata for a page, or None if it is not indexed"""
+        row = self._conn.execute(
+            "SELECT lastmod, etag, last_modified, content_hash FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("lastmod", "etag", "last_modified", "content_hash"), row))
+
+    def pages(self, library: str) -> Set[str]:
+        return {url for (url,) in self._conn.execute(
+            "SELECT url FROM pages WHERE library = ?", (library,)
+        )}
+
+    def touch(self, url: str, lastmod: Optional[str]) -> None:
+        """Record that a page was checked and found unchanged"""
+        self._conn.execute(
+            "UPDATE pages SET lastmod = ?, indexed_at = ? WHERE url = ?",
+            (lastmod, time.time(), url),
+        )
+
+    def store(self,
+              library: str,
+              url: str,
+              title: str,
+              sections: List[Tuple[str, str]],
+              lastmod: Optional[str],
+              etag: Optional[str],
+              last_modified: Optional[str]) -> bool:
+        """
+        Replace a page's sections
+
+        Returns:
+            False if the content was identical to what is already indexed
+        """
+        content_hash = hashlib.sha1(repr((title, sections)).encode("utf-8")).hexdigest()
+        existing = self.page(url)
+        changed = existing is None or existing["content_hash"] != content_hash
+        with self._conn:
+            self._conn.execute("BEGIN")
+            if changed:
+                self._conn.execute("DELETE FROM sections WHERE url = ?", (url,))
+                self._conn.executemany(
+                    "INSERT INTO sections (library, url, title, heading, body) VALUES (?, ?, ?, ?, ?)",
+                    [(library, url, title, heading, body) for heading, body in sections],
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages"
+                " (url, library, lastmod, etag, last_modified, content_hash, indexed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, library, lastmod, etag, last_modified, content_hash, time.time()),
+            )
+        return changed
+
+    def remove(self, urls: Set[str]) -> None:
+        """Drop pages that no longer exist on the site"""
+        with self._conn:
+            self._conn.execute("BEGIN")
+            for url in urls:
+                self._conn.execute("DELETE FROM sections WHERE url = ?", (url,))
+                self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+
+    def search(self, query: str, library: Optional[str] = None, limit: int = 5) -> List[IndexHit]:
+        """
+        BM25-ranked section search
+
+        Args:
+            query: Free-text query
+            library: Restrict results to one library
+            limit: Maximum number of sections to return
+
+        Returns:
+            Matching sections, best first
+        """
+        match = fts_query(query)
+        # SQLite treats a negative LIMIT as no limit
+        if not match or limit < 1:
+            return []
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+        sql = (
+            f"SELECT url, title, heading, snippet(sections, 4, '', '', ' … ', 48),"
+            f" bm25(sections, {weights}) AS score"
+            " FROM sections WHERE sections MATCH ?"
+        )
+        params: List[Any] = [match]
+        if library is not None:
+            sql += " AND library = ?"
+            params.append(library)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        return [IndexHit(*row) for row in self._conn.execute(sql, params)]
+
+    def stats(self) -> Dict[str, int]:
+        """Indexed page count per library"""
+        return dict(self._conn.execute("SELECT library, COUNT(*) FROM pages GROUP BY library"))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class DocsIndexer:
+    """Crawls documentation sitemaps into a DocsIndex"""
+
+    def __init__(self,
+                 index: DocsIndex,
+                 client: httpx.AsyncClient,
+                 user_agent: str,
+                 concurrency: int = 8,
+                 max_page_bytes: int = 2 * 1024 * 1024,
+                 scheme: str = "https",
+                 guard: Optional[UpstreamGuard] = None):
+        """
+        Args:
+            index: Index to store pages in
+            client: Shared HTTP client
+            user_agent: User-Agent header for every request
+            concurrency: Pages downloaded at once
+            max_page_bytes: Bytes read from each page at most
+            scheme: URL scheme of the documentation sites
+            guard: Rate limiting, retries and circuit breaking per host;
+                a guard with default settings if None
+        """
+        self.index = index
+        self.scheme = scheme
+        self.client = client
+        self.guard = guard if guard is not None else UpstreamGuard()
+        self.headers = {"User-Agent": user_agent}
+        self.max_page_bytes = max_page_bytes
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def _get(self,
+                   url: str,
+                   headers: Optional[Dict[str, str]] = None,
+                   stream: bool = False) -> httpx.Response:
+        return await self.guard.send(
+            self.client, "GET", url, stream=stream, headers={**self.headers, **(headers or {})}
+        )
+
+    async def sitemap_urls(self, docs_url: str) -> List[Tuple[str, Optional[str]]]:
+        """
+        Collect the (url, lastmod) entries of a site's sitemaps under docs_url
+
+        Args:
+            docs_url: Documentation root without scheme, e.g. "fastapi.tiangolo.com"
+
+        Returns:
+            Page URLs under the documentation root with their <lastmod> values
+        """
+        host = docs_url.split("/")[0]
+        prefix = f"{self.scheme}://{docs_url.rstrip('/')}"
+        candidates = []
+        try:
+            robots = await self._get(f"{self.scheme}://{host}/robots.txt")
+            if robots.status_code == 200:
+                candidates += re.findall(r"(?im)^sitemap:\s*(\S+)", robots.text)
+        except (httpx.HTTPError, UpstreamUnavailable) as e:
+            logger.warning(f"Could not read robots.txt for {host}: {e}")
+        candidates += [f"{prefix}/sitemap.xml", f"{self.scheme}://{host}/sitemap.xml"]
+
+        entries: Dict[str, Optional[str]] = {}
+        seen: Set[str] = set()
+        pending = list(dict.fromkeys(candidates))
+        while pending:
+            sitemap = pending.pop(0)
+            if sitemap in seen:
+                continue
+            seen.add(sitemap)
+            try:
+                response = await self._get(sitemap)
+                if response.status_code != 200:
+                    continue
+                body = response.content
+                if sitemap.endswith(".gz") or body[:2] == b"\x1f\x8b":
+                    body = gzip.decompress(body)
+                root = ElementTree.fromstring(body)
+            except (httpx.HTTPError, UpstreamUnavailable, ElementTree.ParseError, OSError) as e:
+                logger.warning(f"Could not read sitemap {sitemap}: {e}")
+                continue
+
+            for node in root.iter(f"{SITEMAP_NS}sitemap"):
+                loc = node.findtext(f"{SITEMAP_NS}loc")
+                if loc:
+                    pending.append(loc.strip())
+            for node in root.iter(f"{SITEMAP_NS}url"):
+                loc = (node.findtext(f"{SITEMAP_NS}loc") or "").strip()
+                if loc.startswith(prefix):
+                    entries[loc] = node.findtext(f"{SITEMAP_NS}lastmod")
+        return list(entries.items())
+
+    async def index_page(self, library: str, url: str, lastmod: Optional[str]) -> str:
+        """
+        Index one page if it changed since the last run
+
+        Returns:
+            "unchanged", "updated" or "failed"
+        """
+        stored = self.index.page(url)
+        if stored is not None and lastmod and stored["lastmod"] == lastmod:
+            return "unchanged"
+
+        headers = {}
+        if stored is not None:
+            if stored["etag"]:
+                headers["If-None-Match"] = stored["etag"]
+            if stored["last_modified"]:
+                headers["If-Modified-Since"] = stored["last_modified"]
+
+        async with self._slots:
+            try:
+                response = await self._get(url, headers, stream=True)
+                try:
+                    if response.status_code == 304:
+                        self.index.touch(url, lastmod)
+                        return "unchanged"
+                    response.raise_for_status()
+                    if "html" not in response.headers.get("Content-Type", "text/html"):
+                        return "failed"
+                    body = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        body.extend(chunk[:self.max_page_bytes - len(body)])
+                        if len(body) >= self.max_page_bytes:
+                            break
+                finally:
+                    await response.aclose()
+                html = body.decode(response.encoding or "utf-8", errors="replace")
+            except (httpx.HTTPError, UpstreamUnavailable) as e:
+                logger.warning(f"Could not index {url}: {e}")
+                return "failed"
+
+        title, sections = await asyncio.to_thread(extract_sections, html)
+        changed = self.index.store(
+            library, url, title, sections, lastmod,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return "updated" if changed else "unchanged"
+
+    async def index_library(self, library: str, docs_url: str, max_pages: Optional[int] = None) -> Dict[str, int]:
+        """
+        Index every sitemap page of one library
+
+        Args:
+            library: Library name the pages are filed under
+            docs_url: Documentation root without scheme
+            max_pages: Stop after this many sitemap entries; pages missing from
+                the sitemap are only pruned on a full crawl
+
+        Returns:
+            Count of pages per outcome
+        """
+        entries = await self.sitemap_urls(docs_url)
+        logger.info(f"{library}: {len(entries)} pages in sitemap")
+        full_crawl = max_pages is None and bool(entries)
+        if max_pages is not None:
+            entries = entries[:max_pages]
+
+        outcomes = await asyncio.gather(
+            *(self.index_page(library, url, lastmod) for url, lastmod in entries)
+        )
+        counts = {"updated": 0, "unchanged": 0, "failed": 0, "removed": 0}
+        for outcome in outcomes:
+            counts[outcome] += 1
+
+        if full_crawl:
+            stale = self.index.pages(library) - {url for url, _ in entries}
+            self.index.remove(stale)
+            counts["removed"] = len(stale)
+        logger.info(f"{library}: {counts}")
+        return counts
@@ -0,0 +1,558 @@
+"""
+HTML text extraction for the documentation search server.
+
+Extraction backends share one small interface so the parser can be swapped
+without touching the fetch path:
+
+    beautifulsoup  BeautifulSoup with html.parser (always available)
+    lxml           lxml's C parser (pip install lxml)
+    selectolax     selectolax's lexbor engine (pip install selectolax)
+
+"auto" picks the fastest backend that is installed. Parsing runs in an
+ExtractionPool so a large page never blocks the event loop.
+
+extract_sections splits a page into heading-delimited sections for indexing
+and relevance ranking.
+"""
+
+import asyncio
+import codecs
+import importlib.util
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
+
+# Elements whose contents never count as page text
+SKIPPED_TAGS = {"script", "style"}
+
+# Sections additionally drop site chrome
+SECTION_SKIPPED_TAGS = SKIPPED_TAGS | {"nav", "footer"}
+HEADING_TAGS = {"h1", "h2", "h3", "h4"}
+
+
+def clean_whitespace(text: str) -> str:
+    """Collapse the whitespace left behind by HTML layout into single spaces"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+class StreamingTextExtractor(HTMLParser):
+    """
+    Incremental HTML-to-text extractor
+
+    Text is collected as the document is fed in, so a caller can stop reading
+    the body as soon as enough text has been produced.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+        self._skip_depth = 0
+        self.raw_length = 0
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip_depth:
+            self._parts.append(data)
+            self.raw_length += len(data)
+
+    def raw_text(self) -> str:
+        """Text extracted so far, before whitespace cleanup"""
+        return ''.join(self._parts)
+
+    def text(self) -> str:
+        """Cleaned text extracted so far"""
+        return clean_whitespace(self.raw_text())
+
+
+class SectionCollector:
+    """
+    Groups document text into sections that each start at a heading
+
+    Receives start(tag), end(tag) and data(text) events, so it serves both as
+    the state of SectionExtractor and directly as an lxml parser target.
+    """
+
+    def __init__(self):
+        self.title_parts: List[str] = []
+        self.sections: List[Tuple[List[str], List[str]]] = [([], [])]
+        self.raw_length = 0
+        self._skip_depth = 0
+        self._in_title = False
+        self._in_heading = False
+
+    def start(self, tag: str, attrib: Any = None) -> None:
+        if tag in SECTION_SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in HEADING_TAGS and not self._skip_depth:
+            self.sections.append(([], []))
+            self._in_heading = True
+
+    def end(self, tag: str) -> None:
+        if tag in SECTION_SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        elif tag in HEADING_TAGS:
+            self._in_heading = False
+
+    def data(self, data: str) -> None:
+        if self._in_title:
+            self.title_parts.append(data)
+        elif not self._skip_depth:
+            heading, body = self.sections[-1]
+            (heading if self._in_heading else body).append(data)
+            self.raw_length += len(data)
+
+    def close(self) -> None:
+        return None
+
+    def title(self) -> str:
+        return clean_whitespace(''.join(self.title_parts))
+
+    def cleaned_sections(self) -> List[Tuple[str, str]]:
+        """Sections collected so far as cleaned (heading, text) pairs"""
+        sections = []
+        for heading_parts, body_parts in self.sections:
+            heading = clean_whitespace(''.join(heading_parts)).rstrip("¶#").strip()
+            body = clean_whitespace(''.join(body_parts))
+            if heading or body:
+                sections.append((heading, body))
+        return sections
+
+
+def join_sections(sections: List[Tuple[str, str]]) -> str:
+    """
+    Serialize sections as alternating heading and text lines
+
+    Cleaned text never contains a line break, so the result splits back
+    unambiguously with split_sections.
+    """
+    return "\n".join(line for section in sections for line in section)
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Inverse of join_sections; text without line breaks (e.g. plain
+    extracted text) becomes a single untitled section
+    """
+    lines = text.split("\n")
+    if len(lines) == 1:
+        return [("", text)]
+    return list(zip(lines[0::2], lines[1::2]))
+
+
+class SectionExtractor(HTMLParser):
+    """
+    Incremental section splitter on the stdlib HTML parser
+
+    Exposes the same feed/close/raw_length/text interface as the text
+    extractors; text() returns the join_sections serialization.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.collector = SectionCollector()
+
+    @property
+    def raw_length(self) -> int:
+        return self.collector.raw_length
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        self.collector.start(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        self.collector.end(tag)
+
+    def handle_data(self, data: str) -> None:
+        self.collector.data(data)
+
+    def text(self) -> str:
+        return join_sections(self.collector.cleaned_sections())
+
+
+def extract_sections(html: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Split an HTML document into heading-delimited sections
+
+    Args:
+        html: Raw HTML
+
+    Returns:
+        Tuple of (page title, [(heading, section text), ...]) in document order;
+        text before the first heading has an empty heading
+    """
+    parser = SectionExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.collector.title(), parser.collector.cleaned_sections()
+
+
+class _LxmlTextTarget:
+    """lxml parser target that keeps text outside script/style elements"""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.skip_depth = 0
+        self.raw_length = 0
+
+    def start(self, tag, attrib) -> None:
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+
+    def end(self, tag) -> None:
+        if tag in SKIPPED_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def data(self, data: str) -> None:
+        if not self.skip_depth:
+            self.parts.append(data)
+            self.raw_length += len(data)
+
+    def close(self) -> None:
+        return None
+
+
+class LxmlStreamingExtractor:
+    """Incremental extractor driven by lxml's feed parser"""
+
+    def __init__(self, target: Any = None):
+        from lxml import etree
+
+        self._target = target if target is not None else _LxmlTextTarget()
+        self._parser = etree.HTMLParser(target=self._target)
+
+    @property
+    def raw_length(self) -> int:
+        return self._target.raw_length
+
+    def feed(self, data: str) -> None:
+        if data:
+            self._parser.feed(data)
+
+    def close(self) -> None:
+        try:
+            self._parser.close()
+        except Exception:
+            # lxml raises on documents cut short by an early stop; the text
+            # collected so far is still valid
+            pass
+
+    def raw_text(self) -> str:
+        return ''.join(self._target.parts)
+
+    def text(self) -> str:
+        return clean_whitespace(self.raw_text())
+
+
+class LxmlSectionExtractor(LxmlStreamingExtractor):
+    """Incremental section splitter on lxml's feed parser"""
+
+    def __init__(self):
+        self.collector = SectionCollector()
+        super().__init__(target=self.collector)
+
+    def text(self) -> str:
+        return join_sections(self.collector.cleaned_sections())
+
+
+class TextExtractor(ABC):
+    """Interface for HTML-to-text backends"""
+
+    name = ""
+    module = ""
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the backend's parser package is installed"""
+        return not cls.module or importlib.util.find_spec(cls.module) is not None
+
+    @abstractmethod
+    def raw_text(self, html: str) -> str:
+        """Return the text of a whole HTML document before whitespace cleanup"""
+
+    def extract(self, html: str) -> str:
+        """Return the cleaned text of a whole HTML document"""
+        return clean_whitespace(self.raw_text(html))
+
+    def incremental(self) -> Any:
+        """
+        Return a parser for streaming extraction, with feed(str), close(),
+        raw_text(), text() and a raw_length attribute
+        """
+        return StreamingTextExtractor()
+
+    def incremental_sections(self) -> Any:
+        """
+        Return a streaming parser with feed(str), close(), text() and a
+        raw_length attribute, whose text() is the page split into sections
+        (see join_sections)
+        """
+        return SectionExtractor()
+
+
+class BeautifulSoupExtractor(TextExtractor):
+    """BeautifulSoup with the pure-Python html.parser"""
+
+    name = "beautifulsoup"
+    module = "bs4"
+
+    def raw_text(self, html: str) -> str:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, "html.parser")
+
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.decompose()
+
+        return soup.get_text()
+
+
+class LxmlExtractor(TextExtractor):
+    """lxml's libxml2-based HTML parser"""
+
+    name = "lxml"
+    module = "lxml"
+
+    def raw_text(self, html: str) -> str:
+        parser = LxmlStreamingExtractor()
+        parser.feed(html)
+        parser.close()
+        return parser.raw_text()
+
+    def incremental(self) -> LxmlStreamingExtractor:
+        return LxmlStreamingExtractor()
+
+    def incremental_sections(self) -> LxmlSectionExtractor:
+        return LxmlSectionExtractor()
+
+
+class SelectolaxExtractor(TextExtractor):
+    """selectolax's lexbor HTML5 parser"""
+
+    name = "selectolax"
+    module = "selectolax"
+
+    def raw_text(self, html: str) -> str:
+        from selectolax.lexbor import LexborHTMLParser
+
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(list(SKIPPED_TAGS))
+        if tree.root is None:
+            return ""
+        return tree.root.text(deep=True, separator="")
+
+    def incremental(self) -> Any:
+        # selectolax cannot parse incrementally; lxml's feed parser is the next fastest
+        if LxmlExtractor.available():
+            return LxmlStreamingExtractor()
+        return StreamingTextExtractor()
+
+    def incremental_sections(self) -> Any:
+        if LxmlExtractor.available():
+            return LxmlSectionExtractor()
+        return SectionExtractor()
+
+
+EXTRACTORS: Dict[str, Type[TextExtractor]] = {
+    cls.name: cls for cls in (BeautifulSoupExtractor, LxmlExtractor, SelectolaxExtractor)
+}
+
+# Fastest first; "auto" uses the first one installed
+AUTO_PREFERENCE = ("selectolax", "lxml", "beautifulsoup")
+
+
+def available_extractors() -> List[str]:
+    """Names of the backends that can be used in this environment"""
+    return [name for name, cls in EXTRACTORS.items() if cls.available()]
+
+
+def get_extractor(name: str = "auto") -> TextExtractor:
+    """
+    Instantiate an extraction backend
+
+    Args:
+        name: Backend name, or "auto" for the fastest installed backend
+
+    Returns:
+        TextExtractor instance
+    """
+    if name == "auto":
+        name = next(n for n in AUTO_PREFERENCE if EXTRACTORS[n].available())
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor '{name}'. Available: {', '.join(EXTRACTORS)}")
+    if not EXTRACTORS[name].available():
+        raise ValueError(f"Extractor '{name}' requires the '{EXTRACTORS[name].module}' package")
+    return EXTRACTORS[name]()
+
+
+_process_extractors: Dict[str, TextExtractor] = {}
+
+
+def raw_text_with(name: str, html: str) -> str:
+    """Parse a document with a named backend; entry point for process pool workers"""
+    extractor = _process_extractors.get(name)
+    if extractor is None:
+        extractor = _process_extractors[name] = get_extractor(name)
+    return extractor.raw_text(html)
+
+
+def section_text_with(name: str, html: str) -> str:
+    """Split a document into serialized sections with a named backend's parser"""
+    extractor = _process_extractors.get(name)
+    if extractor is None:
+        extractor = _process_extractors[name] = get_extractor(name)
+    parser = extractor.incremental_sections()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+class ExtractionPool:
+    """Runs extraction off the event loop in a thread or process pool"""
+
+    def __init__(self,
+                 extractor: TextExtractor,
+                 workers: int = 4,
+                 kind: str = "thread",
+                 observe: Optional[Callable[[str, float], None]] = None):
+        """
+        Args:
+            extractor: Backend used for all extraction
+            workers: Pool size; 0 runs extraction inline on the event loop
+            kind: "thread" or "process"; incremental parsing always uses threads
+                because parser state cannot cross a process boundary
+            observe: Called with ("download" | "parse" | "cleanup", seconds)
+                once per extracted page
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown pool kind '{kind}'. Use 'thread' or 'process'")
+        self.extractor = extractor
+        self._observe = observe
+        self._threads: Optional[Executor] = None
+        self._processes: Optional[Executor] = None
+        if workers > 0:
+            self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract")
+            if kind == "process":
+                self._processes = ProcessPoolExecutor(max_workers=workers)
+
+    async def _run(self, executor: Optional[Executor], fn: Callable, *args: Any) -> Any:
+        if executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """Run other CPU-bound page work (e.g. windowing) on the pool's threads"""
+        return await self._run(self._threads, fn, *args)
+
+    def _report(self, **timings: float) -> None:
+        if self._observe is not None:
+            for stage, seconds in timings.items():
+                self._observe(stage, seconds)
+
+    async def extract(self, html: str, sections: bool = False) -> str:
+        """
+        Extract the text of a whole document
+
+        Args:
+            html: Raw HTML
+            sections: Return the page split into sections (see join_sections)
+        """
+        start = time.perf_counter()
+        if sections:
+            executor = self._processes if self._processes is not None else self._threads
+            text = await self._run(executor, section_text_with, self.extractor.name, html)
+            self._report(parse=time.perf_counter() - start)
+            return text
+        if self._processes is not None:
+            raw = await self._run(self._processes, raw_text_with, self.extractor.name, html)
+        else:
+            raw = await self._run(self._threads, self.extractor.raw_text, html)
+        parsed = time.perf_counter()
+        text = await self._run(self._threads, clean_whitespace, raw)
+        self._report(parse=parsed - start, cleanup=time.perf_counter() - parsed)
+        return text
+
+    async def extract_streaming(self,
+                                chunks: AsyncIterator[bytes],
+                                encoding: str,
+                                max_chars: Optional[int],
+                                max_bytes: int,
+                                sections: bool = False) -> Tuple[str, int]:
+        """
+        Extract text from an HTML body as it downloads
+
+        Reading stops once max_chars of cleaned text are available or max_bytes
+        have been received, whichever comes first.
+
+        Args:
+            chunks: Raw body chunks
+            encoding: Character encoding of the body
+            max_chars: Cleaned characters needed before reading stops, or None
+                to read the whole body
+            max_bytes: Hard cap on body bytes read
+            sections: Return the page split into sections (see join_sections)
+
+        Returns:
+            Tuple of (cleaned text, bytes read)
+        """
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        parser = self.extractor.incremental_sections() if sections else self.extractor.incremental()
+        received = 0
+        next_check = max_chars
+        download = parse = cleanup = 0.0
+        iterator = chunks.__aiter__()
+
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            fed = time.perf_counter()
+            download += fed - start
+            if received + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - received]
+            received += len(chunk)
+            await self._run(self._threads, parser.feed, decoder.decode(chunk))
+            parse += time.perf_counter() - fed
+            if received >= max_bytes:
+                break
+            # Cleaning only shrinks text, so skip the check until enough raw text exists
+            if next_check is not None and parser.raw_length >= next_check:
+                start = time.perf_counter()
+                enough = len(await self._run(self._threads, parser.text)) >= max_chars
+                cleanup += time.perf_counter() - start
+                if enough:
+                    break
+                next_check = parser.raw_length * 2
+
+        start = time.perf_counter()
+        await self._run(self._threads, parser.feed, decoder.decode(b"", final=True))
+        await self._run(self._threads, parser.close)
+        closed = time.perf_counter()
+        text = await self._run(self._threads, parser.text)
+        self._report(
+            download=download,
+            parse=parse + closed - start,
+            cleanup=cleanup + time.perf_counter() - closed,
+        )
+        return text, received
+
+    def shutdown(self) -> None:
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
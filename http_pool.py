@@ -0,0 +1,175 @@
+"""
+HTTP connection pooling for the documentation search server.
+
+Builds the single long-lived httpx client shared by every tool call, with
+per-host connection caps, pool hit/miss accounting and optional timing of
+new connections' TCP connect and TLS handshake.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Counts requests served on a reused connection (hit) vs a new one (miss)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self.requests - self.misses
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"requests": self.requests, "hits": self.hits, "misses": self.misses}
+
+
+class HostSemaphores:
+    """Lazily created semaphore per host, all sharing the same limit"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def __call__(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limit)
+            self._semaphores[host] = semaphore
+        return semaphore
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that frees the per-host slot once the body is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the connection-pooling transport to cap concurrent connections per
+    host and record whether each request needed a fresh TCP connection.
+    """
+
+    # httpcore trace events timed when an observer is set
+    TIMED_EVENTS = {"connection.connect_tcp": "connect", "connection.start_tls": "tls"}
+
+    def __init__(self,
+                 transport: httpx.AsyncBaseTransport,
+                 max_per_host: int,
+                 stats: PoolStats,
+                 observe: Optional[Callable[[str, float], None]] = None):
+        self._transport = transport
+        self._host_slots = HostSemaphores(max_per_host)
+        self.stats = stats
+        self._observe = observe
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self.stats
+        observe = self._observe
+        outer_trace = request.extensions.get("trace")
+        started: Dict[str, float] = {}
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.started":
+                stats.misses += 1
+            if observe is not None:
+                event, _, phase = event_name.rpartition(".")
+                if event in self.TIMED_EVENTS:
+                    if phase == "started":
+                        started[event] = time.perf_counter()
+                    elif phase == "complete" and event in started:
+                        observe(self.TIMED_EVENTS[event], time.perf_counter() - started.pop(event))
+            if outer_trace is not None:
+                await outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        stats.requests += 1
+
+        slot = self._host_slots(request.url.host)
+        await slot.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            slot.release()
+            raise
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, slot.release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def http2_available() -> bool:
+    """HTTP/2 support needs the optional `h2` package (pip install httpx[http2])"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_client(max_connections: int = 100,
+                  max_keepalive_connections: int = 20,
+                  keepalive_expiry: float = 30.0,
+                  max_per_host: int = 10,
+                  http2: bool = False,
+                  stats: Optional[PoolStats] = None,
+                  observe: Optional[Callable[[str, float], None]] = None,
+                  **client_kwargs: Any) -> httpx.AsyncClient:
+    """
+    Create the shared AsyncClient
+
+    Args:
+        max_connections: Total connections the pool may hold open
+        max_keepalive_connections: Idle connections kept alive for reuse
+        keepalive_expiry: Seconds an idle connection stays in the pool
+        max_per_host: Concurrent connections allowed to a single host
+        http2: Negotiate HTTP/2 where the server supports it
+        stats: Counter object to record pool hits and misses into
+        observe: Called with ("connect" | "tls", seconds) for each new connection
+        **client_kwargs: Passed through to httpx.AsyncClient
+
+    Returns:
+        Configured httpx.AsyncClient
+    """
+    if http2 and not http2_available():
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    transport = PooledTransport(
+        httpx.AsyncHTTPTransport(limits=limits, http2=http2),
+        max_per_host=max_per_host,
+        stats=stats if stats is not None else PoolStats(),
+        observe=observe,
+    )
+    return httpx.AsyncClient(transport=transport, **client_kwargs)
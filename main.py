@@ -1,11 +1,27 @@
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager, contextmanager
+import argparse
+import asyncio
 import httpx
 import json
 import os
 import logging
-from bs4 import BeautifulSoup
-from typing import Optional, Dict, Any
+import threading
+from typing import TYPE_CHECKING, Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Iterator, List, Tuple
+
+from cache import PageCache, SearchCache, normalize_query
+from dedup import canonical_url, find_near_duplicate, simhash, url_identity
+from extractors import ExtractionPool, get_extractor, split_sections
+from http_pool import HostSemaphores, PoolStats, create_client
+from metrics import Metrics, current_library
+from resilience import UpstreamGuard, UpstreamUnavailable
+from singleflight import SingleFlight
+from windowing import select_window
+
+if TYPE_CHECKING:
+    # Only needed once the index is used; xml and gzip stay off the startup path
+    from docs_index import DocsIndex
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,10 +29,320 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-mcp = FastMCP("docs")
-
 USER_AGENT = "docs-app/1.0"
-SERPER_URL = "https://google.serper.dev/search"
+SERPER_URL = os.getenv("SERPER_URL", "https://google.serper.dev/search")
+
+# Shared HTTP client settings (override via environment)
+HTTP_MAX_CONNECTIONS = int(os.getenv("DOCS_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("DOCS_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("DOCS_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_MAX_PER_HOST = int(os.getenv("DOCS_HTTP_MAX_PER_HOST", "10"))
+HTTP2_ENABLED = os.getenv("DOCS_HTTP2", "false").lower() in ("1", "true", "yes")
+
+# Latency and counter instrumentation (DOCS_METRICS_FILE enables a Prometheus text dump)
+METRICS_ENABLED = os.getenv("DOCS_METRICS", "true").lower() in ("1", "true", "yes")
+METRICS_FILE = os.getenv("DOCS_METRICS_FILE", "")
+METRICS_INTERVAL = float(os.getenv("DOCS_METRICS_INTERVAL", "15"))
+
+# Rate limits, retries and circuit breakers for Serper and the docs hosts
+HTTP_ATTEMPT_TIMEOUT = float(os.getenv("DOCS_HTTP_TIMEOUT", "10"))
+RETRY_ATTEMPTS = int(os.getenv("DOCS_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("DOCS_RETRY_BASE_DELAY", "0.25"))
+RETRY_MAX_DELAY = float(os.getenv("DOCS_RETRY_MAX_DELAY", "4"))
+BREAKER_THRESHOLD = int(os.getenv("DOCS_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET = float(os.getenv("DOCS_BREAKER_RESET", "30"))
+SERPER_RATE = float(os.getenv("SERPER_RATE", "5"))
+SERPER_BURST = int(os.getenv("SERPER_BURST", "10"))
+SERPER_BUDGET = float(os.getenv("SERPER_BUDGET", "12"))
+HOST_RATE = float(os.getenv("DOCS_HOST_RATE", "5"))
+HOST_BURST = int(os.getenv("DOCS_HOST_BURST", "10"))
+FETCH_BUDGET = float(os.getenv("DOCS_FETCH_BUDGET", "15"))
+
+# Page fetch fan-out inside get_docs
+FETCH_CONCURRENCY = int(os.getenv("DOCS_FETCH_CONCURRENCY", "8"))
+FETCH_PER_HOST = int(os.getenv("DOCS_FETCH_PER_HOST", "4"))
+GET_DOCS_DEADLINE = float(os.getenv("DOCS_DEADLINE", "25"))
+
+# get_docs_batch limits
+BATCH_MAX_QUERIES = int(os.getenv("DOCS_BATCH_MAX_QUERIES", "10"))
+BATCH_MAX_CHARS = int(os.getenv("DOCS_BATCH_MAX_CHARS", "40000"))
+
+# Search result cache (set DOCS_SEARCH_CACHE_TTL=0 to disable)
+CACHE_DIR = os.path.expanduser(os.getenv("DOCS_CACHE_DIR", "~/.cache/singularity-docs"))
+SEARCH_CACHE_TTL = float(os.getenv("DOCS_SEARCH_CACHE_TTL", str(6 * 3600)))
+SEARCH_CACHE_MEMORY_ENTRIES = int(os.getenv("DOCS_SEARCH_CACHE_MEMORY_ENTRIES", "256"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("DOCS_SEARCH_CACHE_MAX_ENTRIES", "10000"))
+
+# Page download limits
+MAX_PAGE_CHARS = int(os.getenv("DOCS_MAX_PAGE_CHARS", "10000"))
+MAX_PAGE_BYTES = int(os.getenv("DOCS_MAX_PAGE_BYTES", str(2 * 1024 * 1024)))
+STREAM_EXTRACT = os.getenv("DOCS_STREAM_EXTRACT", "true").lower() in ("1", "true", "yes")
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Send get_docs results as MCP progress notifications while pages are fetched
+STREAM_RESULTS = os.getenv("DOCS_STREAM_RESULTS", "true").lower() in ("1", "true", "yes")
+
+# Query-aware windowing: return the page sections that best match the query
+# instead of the first DOCS_MAX_PAGE_CHARS characters
+WINDOW_ENABLED = os.getenv("DOCS_WINDOW", "true").lower() in ("1", "true", "yes")
+WINDOW_CHARS = int(os.getenv("DOCS_WINDOW_CHARS", "4000"))
+
+# HTML extraction backend: auto, beautifulsoup, lxml or selectolax
+EXTRACTOR = os.getenv("DOCS_EXTRACTOR", "auto")
+EXTRACT_WORKERS = int(os.getenv("DOCS_EXTRACT_WORKERS", "4"))
+EXTRACT_POOL = os.getenv("DOCS_EXTRACT_POOL", "thread")
+
+# Extracted page cache (set DOCS_PAGE_CACHE_MAX_MB=0 to disable)
+PAGE_CACHE_MAX_BYTES = int(float(os.getenv("DOCS_PAGE_CACHE_MAX_MB", "64")) * 1024 * 1024)
+PAGE_CACHE_FRESH_FOR = float(os.getenv("DOCS_PAGE_CACHE_FRESH", "300"))
+
+# Pages returned per get_docs query
+RESULTS_PER_QUERY = 3
+
+# Duplicate suppression: canonical URLs before fetching, SimHash fingerprints
+# after extraction. With refill on, Serper is asked for twice as many results
+# and lower-ranked ones take the place of dropped duplicates.
+DEDUP_ENABLED = os.getenv("DOCS_DEDUP", "true").lower() in ("1", "true", "yes")
+DEDUP_DISTANCE = int(os.getenv("DOCS_DEDUP_DISTANCE", "10"))
+DEDUP_REFILL = os.getenv("DOCS_DEDUP_REFILL", "false").lower() in ("1", "true", "yes")
+SEARCH_RESULTS = RESULTS_PER_QUERY * 2 if DEDUP_ENABLED and DEDUP_REFILL else RESULTS_PER_QUERY
+
+# Background warm-up at startup: pre-open connections to Serper and the docs
+# hosts, and prefetch "library:query" pairs (separated by ";") into the caches
+WARMUP_CONNECT = os.getenv("DOCS_WARMUP_CONNECT", "false").lower() in ("1", "true", "yes")
+WARMUP_QUERIES = os.getenv("DOCS_WARMUP_QUERIES", "")
+
+# Local full-text index built with `python main.py index`
+INDEX_PATH = os.path.expanduser(os.getenv("DOCS_INDEX_PATH", os.path.join(CACHE_DIR, "index.sqlite3")))
+INDEX_FALLBACK = os.getenv("DOCS_INDEX_FALLBACK", "true").lower() in ("1", "true", "yes")
+LOCAL_MAX_RESULTS = 50
+
+metrics = Metrics(enabled=METRICS_ENABLED)
+pool_stats = PoolStats()
+search_flight = SingleFlight()
+fetch_flight = SingleFlight()
+serper_guard = UpstreamGuard(
+    rate=SERPER_RATE, burst=SERPER_BURST, budget=SERPER_BUDGET,
+    max_attempts=RETRY_ATTEMPTS, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY,
+    attempt_timeout=HTTP_ATTEMPT_TIMEOUT,
+    failure_threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET,
+)
+docs_guard = UpstreamGuard(
+    rate=HOST_RATE, burst=HOST_BURST, budget=FETCH_BUDGET,
+    max_attempts=RETRY_ATTEMPTS, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY,
+    attempt_timeout=HTTP_ATTEMPT_TIMEOUT,
+    failure_threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET,
+)
+http_client: Optional[httpx.AsyncClient] = None
+search_cache: Optional[SearchCache] = None
+page_cache: Optional[PageCache] = None
+extraction_pool: Optional[ExtractionPool] = None
+docs_index: Optional["DocsIndex"] = None
+http_client_lock = threading.Lock()
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide HTTP client, creating it on first use
+
+    Creating it loads the CA bundle, which takes tens of milliseconds, so
+    startup does it in a worker thread; the lock makes a request that
+    arrives meanwhile wait for that client instead of building a second one.
+    """
+    global http_client
+    with http_client_lock:
+        if http_client is None or http_client.is_closed:
+            http_client = create_client(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                max_per_host=HTTP_MAX_PER_HOST,
+                http2=HTTP2_ENABLED,
+                stats=pool_stats,
+                observe=metrics.observe if METRICS_ENABLED else None,
+            )
+        return http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and its pooled connections"""
+    global http_client
+    with http_client_lock:
+        client, http_client = http_client, None
+    if client is not None:
+        await client.aclose()
+    logger.info(f"HTTP pool stats: {pool_stats.as_dict()}")
+    logger.info(f"Coalesced searches: {search_flight.as_dict()}, fetches: {fetch_flight.as_dict()}")
+    logger.info(f"Serper guard: {serper_guard.stats.as_dict()}, docs hosts guard: {docs_guard.stats.as_dict()}")
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Return the search result cache, or None when caching is disabled"""
+    global search_cache
+    if search_cache is None and SEARCH_CACHE_TTL > 0:
+        search_cache = SearchCache(
+            os.path.join(CACHE_DIR, "search.sqlite3"),
+            ttl=SEARCH_CACHE_TTL,
+            max_memory_entries=SEARCH_CACHE_MEMORY_ENTRIES,
+            max_disk_entries=SEARCH_CACHE_MAX_ENTRIES,
+        )
+    return search_cache
+
+def get_page_cache() -> Optional[PageCache]:
+    """Return the extracted page cache, or None when caching is disabled"""
+    global page_cache
+    if page_cache is None and PAGE_CACHE_MAX_BYTES > 0:
+        page_cache = PageCache(
+            os.path.join(CACHE_DIR, "pages.sqlite3"),
+            max_bytes=PAGE_CACHE_MAX_BYTES,
+            fresh_for=PAGE_CACHE_FRESH_FOR,
+        )
+    return page_cache
+
+def get_docs_index() -> Optional["DocsIndex"]:
+    """Return the local full-text index, or None if it has not been built"""
+    global docs_index
+    if docs_index is None and os.path.exists(INDEX_PATH):
+        from docs_index import DocsIndex
+    
+        docs_index = DocsIndex(INDEX_PATH)
+    return docs_index
+
+def close_caches() -> None:
+    """Close the on-disk caches and the local index"""
+    global search_cache, page_cache, docs_index
+    if search_cache is not None:
+        logger.info(f"Search cache stats: {search_cache.stats.as_dict()}")
+        search_cache.close()
+        search_cache = None
+    if page_cache is not None:
+        logger.info(f"Page cache stats: {page_cache.stats.as_dict()}")
+        page_cache.close()
+        page_cache = None
+    if docs_index is not None:
+        docs_index.close()
+        docs_index = None
+
+def get_extraction_pool() -> ExtractionPool:
+    """Return the pool that runs HTML extraction off the event loop"""
+    global extraction_pool
+    if extraction_pool is None:
+        extraction_pool = ExtractionPool(
+            get_extractor(EXTRACTOR), workers=EXTRACT_WORKERS, kind=EXTRACT_POOL,
+            observe=metrics.observe if METRICS_ENABLED else None,
+        )
+        logger.info(f"Using '{extraction_pool.extractor.name}' HTML extractor")
+    return extraction_pool
+
+def close_extraction_pool() -> None:
+    """Shut down the extraction workers"""
+    global extraction_pool
+    if extraction_pool is not None:
+        extraction_pool.shutdown()
+        extraction_pool = None
+
+@contextmanager
+def instrumented(stage: str, library: str = "") -> Iterator[None]:
+    """Time a tool call and label everything it does with its library"""
+    token = current_library.set(library)
+    try:
+        with metrics.timer(stage):
+            yield
+    finally:
+        current_library.reset(token)
+
+def component_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters kept by the pool, caches, coalescing and upstream guards"""
+    stats = {
+        "http_pool": pool_stats.as_dict(),
+        "search_coalescing": search_flight.as_dict(),
+        "fetch_coalescing": fetch_flight.as_dict(),
+        "serper_guard": serper_guard.stats.as_dict(),
+        "docs_guard": docs_guard.stats.as_dict(),
+    }
+    if search_cache is not None:
+        stats["search_cache"] = search_cache.stats.as_dict()
+    if page_cache is not None:
+        stats["page_cache"] = page_cache.stats.as_dict()
+    return stats
+
+def write_metrics_file() -> None:
+    """Dump metrics to DOCS_METRICS_FILE in Prometheus text format"""
+    try:
+        metrics.write_prometheus(METRICS_FILE, component_stats())
+    except OSError as e:
+        logger.warning(f"Could not write metrics to {METRICS_FILE}: {e}")
+
+async def dump_metrics_periodically() -> None:
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL)
+        write_metrics_file()
+
+def warmup_queries() -> List[Tuple[str, str]]:
+    """Parse DOCS_WARMUP_QUERIES into (library, query) pairs, skipping unknown libraries"""
+    pairs = []
+    for item in WARMUP_QUERIES.split(";"):
+        library, _, query = item.partition(":")
+        library, query = library.strip(), query.strip()
+        if not library or not query:
+            continue
+        if library not in docs_urls:
+            logger.warning(f"Ignoring warm-up query for unsupported library '{library}'")
+            continue
+        pairs.append((library, query))
+    return pairs
+
+async def preconnect(client: httpx.AsyncClient) -> None:
+    """Open pooled connections to Serper and every docs host so the first request skips TCP and TLS setup"""
+    origins = {f"{httpx.URL(SERPER_URL).scheme}://{httpx.URL(SERPER_URL).netloc.decode()}"}
+    origins.update(f"https://{url.split('/')[0]}" for url in docs_urls.values())
+    
+    async def connect(origin: str) -> None:
+        try:
+            await client.head(origin, headers={"User-Agent": USER_AGENT}, timeout=5.0)
+        except httpx.HTTPError as e:
+            logger.info(f"Warm-up could not connect to {origin}: {e}")
+    
+    await asyncio.gather(*(connect(origin) for origin in sorted(origins)))
+
+async def warm_up() -> None:
+    """
+    Prepare for the first request in the background, so none of this delays
+    the MCP handshake: build the HTTP client, load the HTML parser, and
+    optionally pre-connect and prefetch popular queries
+    """
+    try:
+        with instrumented("warmup"):
+            client = await asyncio.to_thread(get_http_client)
+            # The parser backend is imported on first use; do it before a real page needs it
+            await get_extraction_pool().extract("<p></p>", sections=WINDOW_ENABLED)
+            if WARMUP_CONNECT:
+                await preconnect(client)
+            for library, query in warmup_queries():
+                results = await search_web(f"site:{docs_urls[library]} {query}")
+                links = [result["link"] for result in (results or {}).get("organic", [])]
+                await fetch_all(links, GET_DOCS_DEADLINE)
+                logger.info(f"Warmed caches for '{query}' in {library} ({len(links)} pages)")
+    except Exception as e:
+        logger.warning(f"Warm-up failed: {e}")
+
+@asynccontextmanager
+async def app_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Open the caches and start warm-up at startup, close everything at shutdown"""
+    get_search_cache()
+    get_page_cache()
+    get_extraction_pool()
+    warming = asyncio.create_task(warm_up())
+    dumper = asyncio.create_task(dump_metrics_periodically()) if METRICS_FILE else None
+    try:
+        yield
+    finally:
+        warming.cancel()
+        if dumper is not None:
+            dumper.cancel()
+            write_metrics_file()
+        await close_http_client()
+        close_caches()
+        close_extraction_pool()
+
+mcp = FastMCP("docs", lifespan=app_lifespan)
 
 # Expanded documentation URLs
 docs_urls = {
@@ -31,23 +357,44 @@ docs_urls = {
     "tensorflow": "www.tensorflow.org/api_docs",
 }
 
-async def search_web(query: str) -> Optional[Dict[str, Any]]:
+async def search_web(query: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
     """
     Search the web using Serper API
     
     Args:
         query: Search query string
+        use_cache: Serve a cached result if one exists (fresh results are always cached)
         
     Returns:
         Search results or None if failed
     """
+    cache = get_search_cache()
+    if use_cache and cache is not None:
+        cached = cache.get(query)
+        if cached is not None:
+            logger.info(f"Search cache hit for: {query}")
+            return cached
+    
+    # Identical searches already in flight share one Serper request
+    return await search_flight.do(normalize_query(query), lambda: query_serper(query))
+
+async def query_serper(query: str) -> Dict[str, Any]:
+    """
+    Send one search request to the Serper API and cache a successful result
+    
+    Args:
+        query: Search query string
+        
+    Returns:
+        Search results, with an empty result list if the request failed
+    """
     # Get API key from environment variables for security
     api_key = os.getenv("SERPER_API_KEY")
     if not api_key:
         logger.error("SERPER_API_KEY not found in environment variables")
         return {"organic": []}
         
-    payload = json.dumps({"q": query, "num": 3})  # Increased to 3 results
+    payload = json.dumps({"q": query, "num": SEARCH_RESULTS})
     
     headers = {
         "X-API-KEY": api_key,  # Use proper header name
@@ -55,27 +402,113 @@ async def search_web(query: str) -> Optional[Dict[str, Any]]:
         "User-Agent": USER_AGENT,
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            logger.info(f"Searching for: {query}")
-            response = await client.post(
-                SERPER_URL, headers=headers, data=payload, timeout=30.0
+    client = get_http_client()
+    try:
+        logger.info(f"Searching for: {query}")
+        with metrics.timer("search"):
+            response = await serper_guard.send(
+                client, "POST", SERPER_URL, headers=headers, content=payload
             )
-            response.raise_for_status()
-            result = response.json()
-            logger.info(f"Found {len(result.get('organic', []))} results")
-            return result
-        except httpx.TimeoutException:
-            logger.warning("Search request timed out")
-            return {"organic": []}
-        except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error during search: {e}")
-            return {"organic": []}
-        except Exception as e:
-            logger.error(f"Unexpected error during search: {e}")
-            return {"organic": []}
+        metrics.count("bytes_received", len(response.content), source="serper")
+        response.raise_for_status()
+        result = response.json()
+        logger.info(f"Found {len(result.get('organic', []))} results")
+        cache = get_search_cache()
+        if cache is not None and result.get("organic"):
+            cache.put(query, result)
+        return result
+    except httpx.TimeoutException:
+        logger.warning("Search request timed out")
+        metrics.count("errors", stage="search", kind="timeout")
+        return {"organic": []}
+    except httpx.HTTPStatusError as e:
+        logger.error(f"HTTP error during search: {e}")
+        metrics.count("errors", stage="search", kind="http")
+        return {"organic": []}
+    except UpstreamUnavailable as e:
+        logger.warning(f"Search not sent: {e}")
+        metrics.count("errors", stage="search", kind="unavailable")
+        return {"organic": []}
+    except Exception as e:
+        logger.error(f"Unexpected error during search: {e}")
+        metrics.count("errors", stage="search", kind="other")
+        return {"organic": []}
+
+def check_page_headers(url: str, response: httpx.Response) -> Optional[str]:
+    """
+    Decide from the response headers whether a page is worth downloading
+    
+    Args:
+        url: URL being fetched
+        response: Response whose body has not been read yet
+        
+    Returns:
+        Reason for skipping the page, or None to download it
+    """
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type and content_type not in HTML_CONTENT_TYPES:
+        return f"Skipped {url}: unsupported content type {content_type}"
+    
+    content_length = response.headers.get("Content-Length", "")
+    if content_length.isdigit() and int(content_length) > MAX_PAGE_BYTES:
+        return f"Skipped {url}: page is {int(content_length)} bytes, over the {MAX_PAGE_BYTES} byte limit"
+    return None
+
+async def read_page_text(response: httpx.Response) -> str:
+    """
+    Read and extract a page body, never reading more than MAX_PAGE_BYTES
+    
+    Args:
+        response: Streaming response whose body has not been read yet
+        
+    Returns:
+        Extracted text content
+    """
+    pool = get_extraction_pool()
+    if STREAM_EXTRACT:
+        # Windowing ranks every section, so it needs the whole page
+        text, received = await pool.extract_streaming(
+            response.aiter_bytes(),
+            response.encoding or "utf-8",
+            max_chars=None if WINDOW_ENABLED else MAX_PAGE_CHARS,
+            max_bytes=MAX_PAGE_BYTES,
+            sections=WINDOW_ENABLED,
+        )
+        logger.info(f"Read {received} bytes from {response.url}")
+        metrics.count("bytes_received", received, source="docs")
+        return text
+    
+    body = bytearray()
+    with metrics.timer("download"):
+        async for chunk in response.aiter_bytes():
+            body.extend(chunk[:MAX_PAGE_BYTES - len(body)])
+            if len(body) >= MAX_PAGE_BYTES:
+                break
+    metrics.count("bytes_received", len(body), source="docs")
+    html = body.decode(response.encoding or "utf-8", errors="replace")
+    return await pool.extract(html, sections=WINDOW_ENABLED)
 
 async def fetch_url(url: str) -> str:
+    """
+    Fetch and extract text content from a URL, sharing the work with any
+    identical fetch already in flight
+    
+    Args:
+        url: URL to fetch
+        
+    Returns:
+        Extracted text content (see load_page)
+    """
+    return await fetch_flight.do(url, lambda: load_page(url))
+
+def page_text(text: str) -> str:
+    """Text load_page returns for extracted (or cached) page content"""
+    if WINDOW_ENABLED:
+        return text
+    # Pages cached while windowing was on are stored as sections
+    return text.replace("\n", " ")[:MAX_PAGE_CHARS]
+
+async def load_page(url: str) -> str:
     """
     Fetch and extract text content from a URL
     
@@ -83,80 +516,466 @@ async def fetch_url(url: str) -> str:
         url: URL to fetch
         
     Returns:
-        Extracted text content
+        Extracted text content; with windowing on, the whole page split
+        into sections for page_window to select from
     """
     headers = {"User-Agent": USER_AGENT}
     
-    async with httpx.AsyncClient() as client:
+    cache = get_page_cache()
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None:
+        if cache.is_fresh(cached):
+            cache.mark_hit()
+            logger.info(f"Page cache hit for {url}")
+            return page_text(cached.text)
+        headers.update(cached.conditional_headers())
+    
+    client = get_http_client()
+    try:
+        logger.info(f"Fetching content from: {url}")
+        with metrics.timer("response"):
+            response = await docs_guard.send(client, "GET", url, stream=True, headers=headers)
         try:
-            logger.info(f"Fetching content from: {url}")
-            response = await client.get(url, headers=headers, timeout=30.0)
+            if response.status_code == 304 and cached is not None:
+                cache.mark_revalidated(url)
+                logger.info(f"Page unchanged, served from cache: {url}")
+                return page_text(cached.text)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-                
-            text = soup.get_text()
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            logger.info(f"Extracted {len(text)} characters from {url}")
-            return text[:10000]  # Limit to 10k characters to avoid huge responses
-            
-        except httpx.TimeoutException:
-            logger.warning(f"Timeout fetching {url}")
-            return f"Timeout error fetching {url}"
-        except httpx.HTTPStatusError as e:
-            logger.warning(f"HTTP error fetching {url}: {e}")
-            return f"HTTP error fetching {url}: {e.response.status_code}"
-        except Exception as e:
-            logger.error(f"Unexpected error fetching {url}: {e}")
-            return f"Error fetching {url}: {str(e)}"
+            rejection = check_page_headers(url, response)
+            if rejection:
+                logger.warning(rejection)
+                return rejection
+            text = await read_page_text(response)
+        finally:
+            await response.aclose()
+        
+        if cache is not None:
+            cache.put(
+                url, text,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        
+        logger.info(f"Extracted {len(text)} characters from {url}")
+        return page_text(text)
+        
+    except httpx.TimeoutException:
+        logger.warning(f"Timeout fetching {url}")
+        metrics.count("errors", stage="fetch", kind="timeout")
+        return f"Timeout error fetching {url}"
+    except httpx.HTTPStatusError as e:
+        logger.warning(f"HTTP error fetching {url}: {e}")
+        metrics.count("errors", stage="fetch", kind="http")
+        return f"HTTP error fetching {url}: {e.response.status_code}"
+    except UpstreamUnavailable as e:
+        metrics.count("errors", stage="fetch", kind="unavailable")
+        if cached is not None:
+            logger.warning(f"Serving cached copy of {url}: {e}")
+            return page_text(cached.text)
+        logger.warning(f"Skipped {url}: {e}")
+        return f"Skipped {url}: {e}"
+    except Exception as e:
+        logger.error(f"Unexpected error fetching {url}: {e}")
+        metrics.count("errors", stage="fetch", kind="other")
+        return f"Error fetching {url}: {str(e)}"
+
+fetch_slots = asyncio.Semaphore(FETCH_CONCURRENCY)
+fetch_host_slots = HostSemaphores(FETCH_PER_HOST)
+
+async def fetch_url_limited(url: str) -> str:
+    """
+    Fetch a URL within the global and per-host concurrency limits; callers
+    joining an identical fetch in flight do not take a slot
+    """
+    async def limited() -> str:
+        async with fetch_slots, fetch_host_slots(httpx.URL(url).host):
+            return await load_page(url)
+    
+    return await fetch_flight.do(url, limited)
+
+def fetched_content(url: str, task: "asyncio.Task[str]") -> str:
+    """Result of a finished fetch task, or an error message if it raised"""
+    if task.exception() is not None:
+        logger.error(f"Unexpected error fetching {url}: {task.exception()}")
+        return f"Error fetching {url}: {task.exception()}"
+    return task.result()
+
+async def fetch_all(urls: List[str],
+                    timeout: float,
+                    on_fetched: Optional[Callable[[int, str], Awaitable[None]]] = None) -> List[Optional[str]]:
+    """
+    Fetch several URLs concurrently
+    
+    Args:
+        urls: URLs to fetch
+        timeout: Seconds to wait before giving up on unfinished fetches
+        on_fetched: Awaited with (position, text) as each page finishes,
+            in completion order
+        
+    Returns:
+        Extracted text per URL in input order, None for fetches that missed the deadline
+    """
+    tasks = [asyncio.create_task(fetch_url_limited(url)) for url in urls]
+    if not tasks:
+        return []
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max(timeout, 0)
+    positions = {task: i for i, task in enumerate(tasks)}
+    contents: List[Optional[str]] = [None] * len(tasks)
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(
+            pending,
+            timeout=max(deadline - loop.time(), 0),
+            return_when=asyncio.FIRST_COMPLETED if on_fetched else asyncio.ALL_COMPLETED,
+        )
+        if not done:
+            break
+        for task in sorted(done, key=positions.get):
+            i = positions[task]
+            contents[i] = fetched_content(urls[i], task)
+            if on_fetched is not None:
+                await on_fetched(i, contents[i])
+    for task in sorted(pending, key=positions.get):
+        logger.warning(f"Deadline reached before {urls[positions[task]]} was fetched")
+        task.cancel()
+    return contents
+
+def unsupported_library(library: str) -> Optional[str]:
+    """Error message for a library without configured docs, or None if it is supported"""
+    if library in docs_urls:
+        return None
+    available_libs = ", ".join(docs_urls.keys())
+    return f"Library '{library}' not supported. Available libraries: {available_libs}"
+
+def no_results_text(query: str, library: str) -> str:
+    """Response for a search without results, answered from the local index if possible"""
+    logger.warning(f"No results found for query: {query} in library: {library}")
+    if INDEX_FALLBACK and get_docs_index() is not None:
+        local = format_local_results(query, library, get_docs_index().search(query, library))
+        if local:
+            logger.info(f"Answered '{query}' in {library} from the local index")
+            return local
+    return f"No results found for '{query}' in {library} documentation"
+
+def page_window(query: str, content: Optional[str], budget: int) -> Optional[str]:
+    """
+    Cut fetched page content down to what a response has room for; windowing
+    a large page takes tens of milliseconds, so callers run this on the
+    extraction pool rather than the event loop
+    """
+    if content is None:
+        return None
+    if WINDOW_ENABLED:
+        return select_window(query, split_sections(content), budget)
+    return content[:budget]
+
+def unique_results(organic: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Search results with canonical links, dropping results whose URL is a
+    variant (other version, anchor, tracking parameters) of a higher-ranked one
+    """
+    if not DEDUP_ENABLED:
+        return organic
+    results = []
+    seen = set()
+    for result in organic:
+        link = canonical_url(result["link"])
+        identity = url_identity(link)
+        if identity in seen:
+            logger.info(f"Dropped duplicate URL {result['link']}")
+            metrics.count("duplicates", kind="url")
+            continue
+        seen.add(identity)
+        results.append({**result, "link": link})
+    return results
+
+def page_key(link: str) -> str:
+    """Key under which links to the same page are grouped"""
+    return url_identity(link) if DEDUP_ENABLED else link
+
+def fingerprint(content: Optional[str]) -> Optional[int]:
+    """SimHash of fetched page content, None when duplicates are not checked"""
+    if not DEDUP_ENABLED or content is None:
+        return None
+    return simhash(content)
+
+def format_result(i: int, result: Dict[str, Any], content: Optional[str]) -> str:
+    """Render one search result and its page content"""
+    text = f"--- Result {i}: {result.get('title', 'No title')} ---\n"
+    text += f"URL: {result.get('link', 'No URL')}\n"
+    if 'snippet' in result:
+        text += f"Snippet: {result['snippet']}\n"
+    text += "\nContent:\n"
+    if content is None:
+        content = f"Skipped: page not retrieved within the {GET_DOCS_DEADLINE:g}s deadline"
+    return text + content + "\n\n"
+
+def wants_progress(ctx: Optional[Context]) -> bool:
+    """Whether the client of the current request asked for progress notifications"""
+    if ctx is None or not STREAM_RESULTS:
+        return False
+    try:
+        meta = ctx.request_context.meta
+    except ValueError:
+        # Called directly rather than through an MCP request
+        return False
+    return meta is not None and meta.progressToken is not None
+
+async def send_progress(ctx: Context, progress: float, total: float, message: str) -> None:
+    """Send one progress notification; a client that went away must not fail the call"""
+    try:
+        await ctx.report_progress(progress, total, message)
+    except Exception as e:
+        logger.warning(f"Could not send progress notification: {e}")
+
+def format_snippets(query: str, library: str, organic: List[Dict[str, Any]]) -> str:
+    """Search results without page content, sent before any page is fetched"""
+    parts = [f"Found {len(organic)} results for '{query}' in {library}, fetching pages:\n"]
+    for i, result in enumerate(organic, 1):
+        parts.append(f"{i}. {result.get('title', 'No title')} - {result.get('link', 'No URL')}\n")
+        if 'snippet' in result:
+            parts.append(f"   {result['snippet']}\n")
+    return "".join(parts)
 
 @mcp.tool()  
-async def get_docs(query: str, library: str) -> str:
+async def get_docs(query: str, library: str, use_cache: bool = True, ctx: Optional[Context] = None) -> str:
     """
     Search the latest docs for a given query and library.
     Supports: langchain, openai, llama-index, anthropic, fastapi, django, flask, pytorch, tensorflow
 
+    Clients that send a progress token receive the search snippets, then
+    each result as soon as its page is ready, as progress notifications.
+
     Args:
         query: The query to search for (e.g. "Chroma DB", "authentication")
         library: The library to search in (e.g. "langchain", "openai")
+        use_cache: Set to False to force a fresh search instead of a cached one
 
     Returns:
         Text content from the documentation pages
     """
-    if library not in docs_urls:
-        available_libs = ", ".join(docs_urls.keys())
-        error_msg = f"Library '{library}' not supported. Available libraries: {available_libs}"
-        logger.error(error_msg)
-        return error_msg
+    with instrumented("get_docs", library):
+        error_msg = unsupported_library(library)
+        if error_msg:
+            logger.error(error_msg)
+            return error_msg
     
-    search_query = f"site:{docs_urls[library]} {query}"
-    results = await search_web(search_query)
+        deadline = asyncio.get_running_loop().time() + GET_DOCS_DEADLINE
+        search_query = f"site:{docs_urls[library]} {query}"
+        results = await search_web(search_query, use_cache=use_cache)
     
-    if not results or len(results.get("organic", [])) == 0:
-        logger.warning(f"No results found for query: {query} in library: {library}")
-        return f"No results found for '{query}' in {library} documentation"
+        if not results or len(results.get("organic", [])) == 0:
+            return no_results_text(query, library)
     
-    combined_text = f"Documentation search results for '{query}' in {library}:\n\n"
+        candidates = unique_results(results["organic"])
+        budget = WINDOW_CHARS if WINDOW_ENABLED else MAX_PAGE_CHARS
+        streaming = wants_progress(ctx)
+        if streaming:
+            shown = candidates[:RESULTS_PER_QUERY]
+            await send_progress(ctx, 0, len(shown), format_snippets(query, library, shown))
+        total = min(RESULTS_PER_QUERY, len(candidates))
     
-    for i, result in enumerate(results["organic"], 1):
-        combined_text += f"--- Result {i}: {result.get('title', 'No title')} ---\n"
-        combined_text += f"URL: {result.get('link', 'No URL')}\n"
-        if 'snippet' in result:
-            combined_text += f"Snippet: {result['snippet']}\n"
-        combined_text += "\nContent:\n"
-        content = await fetch_url(result["link"])
-        combined_text += content + "\n\n"
+        # Each result is formatted once, when its page arrives, and reused for the final response
+        rendered: Dict[int, str] = {}
+        kept: List[int] = []
+        kept_fingerprints: List[Optional[int]] = []
+        duplicates: Dict[int, int] = {}
+        batch = list(range(total))
+        attempted = list(batch)
+    
+        async def on_fetched(n: int, content: str) -> None:
+            nonlocal total
+            i = batch[n]
+            page_fingerprint = fingerprint(content)
+            same = find_near_duplicate(page_fingerprint, kept_fingerprints, DEDUP_DISTANCE)
+            if same is not None:
+                metrics.count("duplicates", kind="content")
+                other = kept[same]
+                # Keep the higher-ranked copy, unless the other one was already streamed
+                if streaming or other < i:
+                    duplicates[i] = other
+                    if streaming:
+                        # The slot stays empty unless a refill takes it
+                        total -= 1
+                        await send_progress(ctx, len(rendered), total,
+                                            f"Skipped {candidates[i]['link']}: same page as Result {other + 1}\n")
+                    return
+                del rendered[other]
+                for dropped, original in duplicates.items():
+                    if original == other:
+                        duplicates[dropped] = i
+                duplicates[other] = i
+                kept[same] = i
+            else:
+                kept.append(i)
+                kept_fingerprints.append(page_fingerprint)
+            window = await get_extraction_pool().run(page_window, query, content, budget)
+            rendered[i] = format_result(i + 1, candidates[i], window)
+            if streaming:
+                await send_progress(ctx, len(rendered), total, rendered[i])
     
-    logger.info(f"Successfully retrieved docs for {query} in {library}")
-    return combined_text
+        while batch:
+            remaining = deadline - asyncio.get_running_loop().time()
+            await fetch_all([candidates[i]["link"] for i in batch], remaining, on_fetched)
+            freed = len([i for i in batch if i in duplicates])
+            if not (DEDUP_REFILL and freed) or asyncio.get_running_loop().time() >= deadline:
+                break
+            # Lower-ranked results take the slots of dropped duplicates
+            batch = list(range(len(attempted), min(len(attempted) + freed, len(candidates))))
+            attempted += batch
+            total += len(batch)
+    
+        parts = [f"Documentation search results for '{query}' in {library}:\n\n"]
+        for i in attempted:
+            if i in rendered:
+                parts.append(rendered[i])
+            elif i not in duplicates:
+                parts.append(format_result(i + 1, candidates[i], None))
+        if duplicates:
+            omitted = ", ".join(f"{candidates[i]['link']} (same as Result {same + 1})"
+                                for i, same in sorted(duplicates.items()))
+            parts.append(f"Omitted near-duplicate pages: {omitted}\n")
+    
+        logger.info(f"Successfully retrieved docs for {query} in {library}")
+        return "".join(parts)
+
+@mcp.tool()
+async def get_docs_batch(requests: List[Dict[str, str]], use_cache: bool = True) -> str:
+    """
+    Search the latest docs for several queries in one call.
+    Searches run concurrently, a page returned for more than one query is
+    fetched once, and the whole response shares one size budget.
+
+    Args:
+        requests: List of {"query": ..., "library": ...} objects
+            (e.g. [{"query": "routing", "library": "fastapi"},
+                   {"query": "middleware", "library": "fastapi"}])
+        use_cache: Set to False to force fresh searches instead of cached ones
+
+    Returns:
+        Documentation content grouped per query
+    """
+    with instrumented("get_docs_batch"):
+        if not requests:
+            return "No queries given"
+        if len(requests) > BATCH_MAX_QUERIES:
+            return f"Too many queries: {len(requests)} given, at most {BATCH_MAX_QUERIES} allowed"
+    
+        deadline = asyncio.get_running_loop().time() + GET_DOCS_DEADLINE
+        pairs = [(request.get("query", ""), request.get("library", "")) for request in requests]
+    
+        async def search(query: str, library: str) -> List[Dict[str, Any]]:
+            if unsupported_library(library):
+                return []
+            # Runs in its own task, so the label does not leak to other queries
+            current_library.set(library)
+            results = await search_web(f"site:{docs_urls[library]} {query}", use_cache=use_cache)
+            return unique_results((results or {}).get("organic", []))[:RESULTS_PER_QUERY]
+    
+        organics = await asyncio.gather(*(search(query, library) for query, library in pairs))
+    
+        # Fetch each distinct page once, whichever queries it answers
+        page_urls: Dict[str, str] = {}
+        for organic in organics:
+            for result in organic:
+                page_urls.setdefault(page_key(result["link"]), result["link"])
+        urls = list(page_urls.values())
+        remaining = deadline - asyncio.get_running_loop().time()
+        contents = dict(zip(urls, await fetch_all(urls, remaining)))
+    
+        # Pages with near-identical text count as the same page
+        same_page: Dict[str, str] = {}
+        fingerprints: List[Optional[int]] = []
+        for url in urls:
+            page_fingerprint = fingerprint(contents[url])
+            same = find_near_duplicate(page_fingerprint, fingerprints, DEDUP_DISTANCE)
+            if same is not None:
+                same_page[url] = same_page.get(urls[same], urls[same])
+                metrics.count("duplicates", kind="content")
+            fingerprints.append(page_fingerprint)
+    
+        page_budget = min(WINDOW_CHARS if WINDOW_ENABLED else MAX_PAGE_CHARS,
+                          BATCH_MAX_CHARS // max(len(urls), 1))
+    
+        parts = [f"Documentation search results for {len(pairs)} queries:\n\n"]
+        first_seen: Dict[str, str] = {}
+        for n, ((query, library), organic) in enumerate(zip(pairs, organics), 1):
+            parts.append(f"=== Query {n}: '{query}' in {library} ===\n\n")
+            error_msg = unsupported_library(library)
+            if error_msg:
+                parts.append(error_msg + "\n\n")
+                continue
+            if not organic:
+                parts.append(no_results_text(query, library) + "\n\n")
+                continue
+            for i, result in enumerate(organic, 1):
+                url = page_urls[page_key(result["link"])]
+                page = same_page.get(url, url)
+                if page in first_seen:
+                    content = f"Same page as {first_seen[page]}"
+                else:
+                    first_seen[page] = f"Query {n}, Result {i}"
+                    content = await get_extraction_pool().run(page_window, query, contents[url], page_budget)
+                parts.append(format_result(i, result, content))
+    
+        logger.info(f"Retrieved {len(urls)} distinct pages for {len(pairs)} queries")
+        return "".join(parts)
+
+def format_local_results(query: str, library: str, hits) -> Optional[str]:
+    """Render local index hits in the same layout as get_docs, or None if there are none"""
+    if not hits:
+        return None
+    text = f"Local index results for '{query}' in {library}:\n\n"
+    for i, hit in enumerate(hits, 1):
+        heading = f" - {hit.heading}" if hit.heading else ""
+        text += f"--- Result {i}: {hit.title or 'No title'}{heading} ---\n"
+        text += f"URL: {hit.url}\n"
+        text += f"\nContent:\n{hit.snippet}\n\n"
+    return text
+
+@mcp.tool()
+async def search_local_docs(query: str, library: str, max_results: int = 5) -> str:
+    """
+    Search the locally indexed docs without any network access.
+    Requires the index to have been built with `python main.py index`.
+
+    Args:
+        query: The query to search for (e.g. "dependency injection")
+        library: The library to search in (e.g. "fastapi")
+        max_results: Maximum number of matching sections to return (1-50)
+
+    Returns:
+        Best-matching documentation sections
+    """
+    with instrumented("search_local_docs", library):
+        error_msg = unsupported_library(library)
+        if error_msg:
+            return error_msg
+    
+        index = get_docs_index()
+        if index is None:
+            return "Local index not found. Build it with `python main.py index`."
+    
+        limit = min(max(max_results, 1), LOCAL_MAX_RESULTS)
+        local = format_local_results(query, library, index.search(query, library, limit))
+        return local or f"No results found for '{query}' in the local {library} index"
+
+@mcp.tool()
+async def server_stats() -> str:
+    """
+    Report server performance statistics: p50/p95/p99 latency per stage and
+    library, bytes transferred, errors, and cache, connection pool,
+    request coalescing and rate limiter counters.
+
+    Returns:
+        JSON document with the statistics
+    """
+    stats = metrics.snapshot()
+    stats["components"] = component_stats()
+    stats["open_circuits"] = {**serper_guard.open_circuits(), **docs_guard.open_circuits()}
+    return json.dumps(stats, indent=2)
 
 @mcp.tool()
 async def list_supported_libraries() -> str:
@@ -171,6 +990,42 @@ async def list_supported_libraries() -> str:
         result += f"• {lib}: https://{url}\n"
     return result
 
-if __name__ == "__main__":
+async def build_index(libraries: List[str], max_pages: Optional[int]) -> None:
+    """Crawl the sitemaps of the given libraries into the local index"""
+    from docs_index import DocsIndex, DocsIndexer
+    
+    index = DocsIndex(INDEX_PATH)
+    indexer = DocsIndexer(index, get_http_client(), USER_AGENT,
+                          concurrency=FETCH_CONCURRENCY, max_page_bytes=MAX_PAGE_BYTES,
+                          guard=docs_guard)
+    try:
+        for library in libraries:
+            await indexer.index_library(library, docs_urls[library], max_pages=max_pages)
+        logger.info(f"Indexed pages per library: {index.stats()}")
+    finally:
+        index.close()
+        await close_http_client()
+
+def main():
+    """Command line entry point: serve over stdio, or build the local index"""
+    parser = argparse.ArgumentParser(description="MCP documentation search server")
+    subcommands = parser.add_subparsers(dest="command")
+    index_parser = subcommands.add_parser("index", help="Build or refresh the local full-text index")
+    index_parser.add_argument("libraries", nargs="*",
+                              help="Libraries to index (default: all)")
+    index_parser.add_argument("--max-pages", type=int, default=None,
+                              help="Limit the number of pages per library")
+    args = parser.parse_args()
+    
+    if args.command == "index":
+        unknown = [lib for lib in args.libraries if lib not in docs_urls]
+        if unknown:
+            parser.error(f"unsupported libraries: {', '.join(unknown)}")
+        asyncio.run(build_index(args.libraries or list(docs_urls), args.max_pages))
+        return
+    
     logger.info("Starting MCP documentation search server")
     mcp.run(transport="stdio")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Lightweight latency and counter instrumentation.
+
+Metrics records per-stage timing histograms (labelled with the library the
+current tool call is for) and named counters. Percentiles are estimated
+from fixed exponential buckets, so recording is O(log buckets) and memory
+stays constant. When disabled, timers are a shared no-op context manager.
+"""
+
+import os
+import tempfile
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
+
+# Library of the tool call being served; inherited by tasks it spawns
+current_library: ContextVar[str] = ContextVar("current_library", default="")
+
+# Bucket upper bounds in seconds: 0.5ms growing by 1.5x up to ~2 minutes
+BUCKET_BOUNDS: Tuple[float, ...] = tuple(0.0005 * 1.5 ** i for i in range(31))
+
+_NO_TIMER = nullcontext()
+
+
+class Histogram:
+    """Bucketed latency histogram with percentile estimates"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th quantile (0..1) by interpolating within its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                lower = BUCKET_BOUNDS[i - 1] if i > 0 else 0.0
+                upper = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": round(1000 * self.sum / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(1000 * self.percentile(0.50), 3),
+            "p95_ms": round(1000 * self.percentile(0.95), 3),
+            "p99_ms": round(1000 * self.percentile(0.99), 3),
+            "max_ms": round(1000 * self.max, 3),
+        }
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_stage", "_start")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._metrics.observe(self._stage, time.perf_counter() - self._start)
+
+
+class Metrics:
+    """Registry of stage histograms and counters"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def observe(self, stage: str, seconds: float, library: Optional[str] = None) -> None:
+        """Record one timing for a stage, labelled with the current library"""
+        if not self.enabled:
+            return
+        key = (stage, library if library is not None else current_library.get())
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    def timer(self, stage: str) -> ContextManager:
+        """Context manager that records the time spent inside it"""
+        if not self.enabled:
+            return _NO_TIMER
+        return _Timer(self, stage)
+
+    def count(self, name: str, value: float = 1, **labels: str) -> None:
+        """Add to a counter identified by name and labels"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All recorded timings and counters as plain data"""
+        stages: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (stage, library), histogram in sorted(self._histograms.items()):
+            stages.setdefault(stage, {})[library or "all"] = histogram.summary()
+        counters: Dict[str, float] = {}
+        for (name, labels), value in sorted(self._counters.items()):
+            label_text = ",".join(f"{k}={v}" for k, v in labels)
+            counters[f"{name}{{{label_text}}}" if label_text else name] = value
+        return {
+            "enabled": self.enabled,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "stages": stages,
+            "counters": counters,
+        }
+
+    def prometheus(self, components: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """
+        Render metrics in the Prometheus text exposition format
+
+        Args:
+            components: Extra {component: {counter: value}} stats to export,
+                e.g. cache and connection pool counters
+        """
+        lines: List[str] = [
+            "# HELP docs_stage_seconds Time spent per stage",
+            "# TYPE docs_stage_seconds histogram",
+        ]
+        for (stage, library), histogram in sorted(self._histograms.items()):
+            labels = f'stage="{stage}",library="{library}"'
+            cumulative = 0
+            for bound, n in zip(BUCKET_BOUNDS, histogram.buckets):
+                cumulative += n
+                lines.append(f'docs_stage_seconds_bucket{{{labels},le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'docs_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"docs_stage_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"docs_stage_seconds_count{{{labels}}} {histogram.count}")
+
+        names = sorted({name for name, _ in self._counters})
+        for name in names:
+            lines.append(f"# TYPE docs_{name}_total counter")
+            for (counter, labels), value in sorted(self._counters.items()):
+                if counter == name:
+                    label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"docs_{name}_total{{{label_text}}} {value:g}")
+
+        if components:
+            lines.append("# TYPE docs_component_stat gauge")
+            for component, stats in sorted(components.items()):
+                for stat, value in sorted(stats.items()):
+                    if isinstance(value, (int, float)):
+                        lines.append(
+                            f'docs_component_stat{{component="{component}",stat="{stat}"}} {value:g}'
+                        )
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, components: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """Atomically write the Prometheus text dump, e.g. for node_exporter's textfile collector"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(self.prometheus(components))
+        os.replace(tmp_path, path)
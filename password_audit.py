@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Password Audit
+Scores every password in a large credential dump with the same rules as
+PasswordCreator.check_password_strength
+
+The file is memory-mapped and cut into chunks at line boundaries; chunks are
+scored in a process pool and their results written back in order, so memory
+stays constant for dumps of any size. Characters are classified with a few
+bytes.translate passes over each whole chunk instead of per-character Python
+checks. Lines with non-ASCII characters go through check_password_strength
+itself, which keeps its Unicode-aware rules.
+"""
+
+import mmap
+import operator
+import os
+import string
+import sys
+from collections import Counter
+from itertools import chain, compress, count, islice, repeat
+from json.encoder import encode_basestring_ascii
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from breach_filter import open_filter
+from password_bulk import run_ordered
+from password_creator import PasswordCreator, score_password
+
+# Bytes of input per worker task
+CHUNK_BYTES = 4 << 20
+
+LOWER, UPPER, DIGIT, SPECIAL, BREACHED = 1, 2, 4, 8, 16
+CLASS_NAMES = ((LOWER, "lowercase"), (UPPER, "uppercase"), (DIGIT, "digits"), (SPECIAL, "special"))
+
+
+def _keep(chars: str) -> bytes:
+    """Delete set for bytes.translate that keeps only chars and newlines"""
+    keep = set((chars + "\n").encode("ascii"))
+    return bytes(b for b in range(256) if b not in keep)
+
+
+CLASS_DELETES = tuple(
+    _keep(chars) for chars in (
+        string.ascii_lowercase, string.ascii_uppercase, string.digits, PasswordCreator().special_chars
+    )
+)
+
+
+def _flags(has_lower: bool, has_upper: bool, has_digit: bool, has_special: bool, breached: bool = False) -> int:
+    return has_lower * LOWER | has_upper * UPPER | has_digit * DIGIT | has_special * SPECIAL | breached * BREACHED
+
+
+def _score(length: int, flags: int) -> Tuple[int, str, List[str]]:
+    return score_password(length, bool(flags & LOWER), bool(flags & UPPER), bool(flags & DIGIT),
+                          bool(flags & SPECIAL), bool(flags & BREACHED))
+
+
+_fields: Dict[Tuple[int, int, bool], str] = {}
+
+
+def record_fields(length: int, flags: int, checked: bool = False) -> str:
+    """
+    End of a JSONL record for a length and flags, built once per combination;
+    checked adds the "breached" field when a breach filter was used
+    """
+    fields = _fields.get((length, flags, checked))
+    if fields is None:
+        score, strength, feedback = _score(length, flags)
+        booleans = ", ".join(f'"has_{name}": {"true" if flags & bit else "false"}' for bit, name in CLASS_NAMES)
+        if checked:
+            booleans += f', "breached": {"true" if flags & BREACHED else "false"}'
+        fields = _fields[(length, flags, checked)] = (
+            f'"length": {length}, "score": {score}, "strength": "{strength}", {booleans}, '
+            f'"feedback": [{", ".join(encode_basestring_ascii(f) for f in feedback)}]}}\n'
+        )
+    return fields
+
+
+def audit_lines(data: bytes,
+                first_line: int,
+                include_passwords: bool = True,
+                records: bool = True,
+                breach_filter: Optional[str] = None) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Score the newline-separated passwords in data
+
+    Args:
+        data: Whole lines of the dump
+        first_line: Line number of the first line in data
+        include_passwords: Put the password itself in each JSONL record
+        records: Build the JSONL records; False only counts
+        breach_filter: Breached password filter file to look every password up in
+
+    Returns:
+        (JSONL records, counts) where counts holds "joint" (a Counter of
+        (length, class flags)), "blank_lines" and "non_ascii"
+    """
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n")
+    lines = data.split(b"\n")
+    # Chunks end with a newline (except perhaps the last), leaving an empty piece that is not a line
+    if not lines[-1]:
+        lines.pop()
+    n_lines = len(lines)
+
+    # Whole-chunk passes keep the per-line work in C: deleting everything
+    # but one class and the newlines, then splitting, leaves each line's
+    # members of that class, so bool() of the piece says whether it has any
+    present = [
+        islice(map(bool, data.translate(None, delete).split(b"\n")), n_lines)
+        for delete in CLASS_DELETES
+    ]
+    # Newlines are ASCII, so decoding the whole chunk splits into the same lines
+    needs_text = include_passwords or breach_filter or not data.isascii()
+    passwords = data.decode("utf-8", "replace").split("\n") if needs_text else []
+    if breach_filter:
+        listed = open_filter(breach_filter)
+        present.append(map(listed.__contains__, passwords))
+    keys = list(zip(map(len, lines), *present))
+
+    non_ascii = 0
+    if not data.isascii():
+        creator = PasswordCreator(breach_filter=breach_filter)
+        for i in compress(count(), map(operator.not_, map(bytes.isascii, lines))):
+            analysis = creator.check_password_strength(passwords[i])
+            key = (analysis["length"], analysis["has_lowercase"], analysis["has_uppercase"],
+                   analysis["has_digits"], analysis["has_special"])
+            keys[i] = key + (analysis["breached"],) if breach_filter else key
+            non_ascii += 1
+
+    # Blank lines are skipped by compress() with the lines themselves as the selector
+    keys = list(compress(keys, lines))
+    joint = Counter(keys)
+    counts = {
+        "joint": Counter({(key[0], _flags(*key[1:])): total for key, total in joint.items()}),
+        "blank_lines": n_lines - len(keys),
+        "non_ascii": non_ascii,
+    }
+    if not records:
+        return b"", counts
+
+    checked = bool(breach_filter)
+    ends = {key: record_fields(key[0], _flags(*key[1:]), checked) for key in joint}
+    numbers = compress(count(first_line), lines)
+    if include_passwords:
+        parts = zip(map('{"line": %d, "password": '.__mod__, numbers),
+                    map(encode_basestring_ascii, compress(passwords, lines)),
+                    repeat(", "), map(ends.__getitem__, keys))
+    else:
+        parts = zip(map('{"line": %d, '.__mod__, numbers), map(ends.__getitem__, keys))
+    return "".join(chain.from_iterable(parts)).encode("ascii"), counts
+
+
+def audit_range(path: str,
+                start: int,
+                end: int,
+                first_line: int,
+                include_passwords: bool = True,
+                records: bool = True,
+                breach_filter: Optional[str] = None) -> Tuple[bytes, Dict[str, Any]]:
+    """Score the lines in bytes [start, end) of a file; entry point for process pool workers"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    return audit_lines(data, first_line, include_passwords, records, breach_filter)
+
+
+def _file_chunks(path: str, chunk_bytes: int) -> Iterator[Tuple[int, int, int]]:
+    """(start, end, first line number) for chunks of a file cut at line boundaries"""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        start = 0
+        line = 1
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                newline = mm.find(b"\n", end - 1)
+                end = size if newline < 0 else newline + 1
+            yield start, end, line
+            line += mm[start:end].count(b"\n")
+            start = end
+
+
+def _stream_chunks(stream: BinaryIO, chunk_bytes: int) -> Iterator[Tuple[bytes, int]]:
+    """(data, first line number) for chunks of a stream cut at line boundaries"""
+    line = 1
+    while True:
+        data = stream.read(chunk_bytes)
+        if not data:
+            return
+        if not data.endswith(b"\n"):
+            data += stream.readline()
+        yield data, line
+        line += data.count(b"\n")
+
+
+class AuditSummary:
+    """Aggregate histograms over an audit"""
+
+    def __init__(self, breach_checked: bool = False):
+        self.breach_checked = breach_checked
+        self.joint: Counter = Counter()
+        self.blank_lines = 0
+        self.non_ascii = 0
+
+    def add(self, counts: Dict[str, Any]):
+        self.joint.update(counts["joint"])
+        self.blank_lines += counts["blank_lines"]
+        self.non_ascii += counts["non_ascii"]
+
+    def as_dict(self) -> Dict[str, Any]:
+        strength: Counter = Counter()
+        score: Counter = Counter()
+        length: Counter = Counter()
+        classes: Counter = Counter()
+        combinations: Counter = Counter()
+        breached = 0
+        for (n, flags), total in self.joint.items():
+            points, label, _ = _score(n, flags)
+            if flags & BREACHED:
+                breached += total
+            strength[label] += total
+            score[points] += total
+            length[n] += total
+            names = [name for bit, name in CLASS_NAMES if flags & bit]
+            for name in names:
+                classes[name] += total
+            combinations["+".join(names) or "none"] += total
+        return {
+            "passwords": sum(self.joint.values()),
+            "blank_lines": self.blank_lines,
+            "non_ascii": self.non_ascii,
+            "breached": breached if self.breach_checked else None,
+            "strength": {label: strength[label] for label in ("Weak", "Medium", "Strong", "Very Strong")},
+            "score": {str(points): score[points] for points in range(7)},
+            "length": {str(n): length[n] for n in sorted(length)},
+            "character_classes": {name: classes[name] for _, name in CLASS_NAMES},
+            "class_combinations": dict(combinations.most_common()),
+        }
+
+
+def audit_file(path: str,
+               out: Optional[BinaryIO] = None,
+               workers: Optional[int] = None,
+               include_passwords: bool = True,
+               breach_filter: Optional[str] = None,
+               chunk_bytes: int = CHUNK_BYTES) -> AuditSummary:
+    """
+    Score every line of a password file
+
+    Args:
+        path: File with one password per line, or "-" for stdin
+        out: Binary stream for the per-password JSONL records, or None to
+            only collect the summary
+        workers: Worker processes; 0 or 1 scores in this process, None uses
+            every CPU
+        include_passwords: Put the password itself in each record
+        breach_filter: Breached password filter file; listed passwords score 0
+        chunk_bytes: Input bytes per worker task
+
+    Returns:
+        Aggregate histograms
+    """
+    summary = AuditSummary(breach_checked=bool(breach_filter))
+
+    def finish(result: Tuple[bytes, Dict[str, Any]]):
+        lines, counts = result
+        if out is not None:
+            out.write(lines)
+        summary.add(counts)
+
+    records = out is not None
+    if path == "-":
+        run_ordered(audit_lines,
+                    ((data, line, include_passwords, records, breach_filter)
+                     for data, line in _stream_chunks(sys.stdin.buffer, chunk_bytes)),
+                    finish, workers)
+    else:
+        run_ordered(audit_range,
+                    ((path, start, end, line, include_passwords, records, breach_filter)
+                     for start, end, line in _file_chunks(path, chunk_bytes)),
+                    finish, workers)
+    return summary
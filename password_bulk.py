@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Bulk Password Engine
+Generates passwords by the million for credential provisioning
+
+Randomness comes from large os.urandom buffers. Bytes are turned into
+characters with bytes.translate, and the bytes that would bias the result
+are deleted in the same C-level pass (rejection sampling). A candidate
+that misses the minimum character counts is rejected whole, so every
+password meeting the criteria is equally likely. Work is split into chunks
+across a process pool and written out in order as a stream, so memory
+stays constant whatever the count.
+"""
+
+import json
+import os
+import weakref
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, BinaryIO, Callable, Deque, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from password_creator import PasswordCreator
+
+# Bytes requested from the OS per refill
+BUFFER_SIZE = 1 << 16
+
+# Passwords generated per worker task
+CHUNK_SIZE = 20000
+
+# Below this share of random candidates meeting the minimums, build
+# passwords from the required characters instead of rejecting candidates
+MIN_ACCEPTANCE = 0.1
+
+FORMATS = ("plain", "jsonl")
+
+
+class PasswordSpec(NamedTuple):
+    """Precomputed character pools for one set of generation options"""
+    length: int
+    pool: str
+    # (character class, minimum count) for each class with a minimum
+    classes: Tuple[Tuple[str, int], ...]
+
+
+def build_spec(length: int = 12,
+               use_uppercase: bool = True,
+               use_lowercase: bool = True,
+               use_digits: bool = True,
+               use_special: bool = True,
+               exclude_ambiguous: bool = False,
+               custom_chars: str = "",
+               min_uppercase: int = 1,
+               min_lowercase: int = 1,
+               min_digits: int = 1,
+               min_special: int = 1) -> PasswordSpec:
+    """
+    Build the character pools once for PasswordCreator.generate_password options
+
+    Raises:
+        ValueError: For the same invalid options generate_password rejects,
+            or a pool of more than 256 distinct characters
+    """
+    if length < 4:
+        raise ValueError("Password length must be at least 4 characters")
+
+    creator = PasswordCreator()
+    classes = []
+    for enabled, chars, minimum, strip_ambiguous in (
+        (use_lowercase, creator.lowercase, min_lowercase, True),
+        (use_uppercase, creator.uppercase, min_uppercase, True),
+        (use_digits, creator.digits, min_digits, True),
+        (use_special, creator.special_chars, min_special, False),
+    ):
+        if not enabled:
+            continue
+        if exclude_ambiguous and strip_ambiguous:
+            chars = ''.join(c for c in chars if c not in creator.ambiguous_chars)
+        classes.append((chars, minimum))
+
+    pool = ''.join(dict.fromkeys(''.join(chars for chars, _ in classes) + custom_chars))
+    if not pool:
+        raise ValueError("At least one character type must be enabled")
+    if sum(minimum for _, minimum in classes) > length:
+        raise ValueError("Minimum requirements exceed password length")
+    if len(pool) > 256:
+        raise ValueError("Bulk generation supports at most 256 distinct characters")
+    return PasswordSpec(length, pool, tuple((chars, m) for chars, m in classes if m > 0))
+
+
+# Every live sampler, so their buffers can be dropped in forked children
+_samplers: "weakref.WeakSet[ByteSampler]" = weakref.WeakSet()
+
+
+class ByteSampler:
+    """
+    Uniform draws from range(n), n <= 256, as a stream of bytes
+
+    Each random byte b below the largest multiple of n maps to b % n (or
+    straight to an output byte via `alphabet`); bytes above it are deleted,
+    which removes the modulo bias.
+    """
+
+    def __init__(self, n: int, alphabet: Optional[bytes] = None, buffer_size: int = BUFFER_SIZE):
+        if not 0 < n <= 256:
+            raise ValueError("Sampler range must be between 1 and 256")
+        limit = 256 - 256 % n
+        symbols = alphabet if alphabet is not None else bytes(range(n))
+        self._table = bytes(symbols[b % n] if b < limit else 0 for b in range(256))
+        self._reject = bytes(range(limit, 256))
+        self._buffer_size = buffer_size
+        self._buffer = b""
+        self._pos = 0
+        _samplers.add(self)
+
+    def reset(self) -> None:
+        """Discard buffered random bytes"""
+        self._buffer = b""
+        self._pos = 0
+
+    def draw(self, count: int) -> bytes:
+        """Return count uniform samples"""
+        parts = []
+        while count > 0:
+            if self._pos >= len(self._buffer):
+                self._buffer = os.urandom(max(self._buffer_size, count * 2)).translate(
+                    self._table, self._reject
+                )
+                self._pos = 0
+            part = self._buffer[self._pos:self._pos + count]
+            self._pos += len(part)
+            count -= len(part)
+            parts.append(part)
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+
+class BulkGenerator:
+    """Generates batches of passwords for one PasswordSpec"""
+
+    def __init__(self, spec: PasswordSpec):
+        self.spec = spec
+        pool = spec.pool
+        self._ascii = pool.isascii()
+        n = len(pool)
+        # Passwords are generated as pool indices; ASCII pools get their characters in the same pass
+        self._sampler = ByteSampler(n)
+        self._to_chars = bytes(ord(pool[i]) if self._ascii and i < n else 0 for i in range(256))
+        # For each class, the indices outside it: deleting them leaves the class members to count
+        self._checks = [
+            (bytes(i for i, c in enumerate(pool) if c not in chars), minimum)
+            for chars, minimum in spec.classes
+        ]
+        self._class_samplers = [
+            (ByteSampler(len(chars), bytes(pool.index(c) for c in chars)), minimum)
+            for chars, minimum in spec.classes
+        ]
+        self._constructive = self.acceptance() < MIN_ACCEPTANCE
+        self._position_samplers: List[ByteSampler] = []
+
+    def _accepts(self, candidate: bytes) -> bool:
+        for outside, minimum in self._checks:
+            if len(candidate.translate(None, outside)) < minimum:
+                return False
+        return True
+
+    def acceptance(self, trials: int = 2000) -> float:
+        """Share of uniformly random candidates that meet the minimum counts"""
+        if not self._checks:
+            return 1.0
+        length = self.spec.length
+        data = self._sampler.draw(trials * length)
+        accepted = sum(self._accepts(data[i:i + length]) for i in range(0, len(data), length))
+        return accepted / trials
+
+    def _by_rejection(self, count: int) -> List[bytes]:
+        length = self.spec.length
+        passwords: List[bytes] = []
+        while len(passwords) < count:
+            data = self._sampler.draw((count - len(passwords)) * length)
+            candidates = [data[i:i + length] for i in range(0, len(data), length)]
+            if self._checks:
+                candidates = [c for c in candidates if self._accepts(c)]
+            passwords.extend(candidates)
+        return passwords
+
+    def _by_construction(self, count: int) -> List[bytes]:
+        # Same scheme as generate_password: the required characters, the rest
+        # from the whole pool, then a Fisher-Yates shuffle
+        length = self.spec.length
+        if not self._position_samplers:
+            self._position_samplers = [ByteSampler(k) for k in range(1, length + 1)]
+        required = sum(minimum for _, minimum in self._class_samplers)
+        passwords = []
+        for _ in range(count):
+            chars = bytearray()
+            for sampler, minimum in self._class_samplers:
+                chars += sampler.draw(minimum)
+            chars += self._sampler.draw(length - required)
+            for i in range(length - 1, 0, -1):
+                j = self._position_samplers[i].draw(1)[0]
+                chars[i], chars[j] = chars[j], chars[i]
+            passwords.append(bytes(chars))
+        return passwords
+
+    def generate(self, count: int) -> List[str]:
+        """Generate count passwords"""
+        indices = self._by_construction(count) if self._constructive else self._by_rejection(count)
+        if self._ascii:
+            length = self.spec.length
+            text = b"".join(indices).translate(self._to_chars).decode("ascii")
+            return [text[i:i + length] for i in range(0, len(text), length)]
+        pool = self.spec.pool
+        return [''.join(map(pool.__getitem__, password)) for password in indices]
+
+
+def format_passwords(passwords: List[str], fmt: str = "plain", key: str = "password") -> bytes:
+    """Render passwords as newline-terminated plain lines or JSONL records"""
+    if not passwords:
+        return b""
+    if fmt == "plain":
+        return ("\n".join(passwords) + "\n").encode("utf-8")
+    if fmt == "jsonl":
+        return "".join(json.dumps({key: p}) + "\n" for p in passwords).encode("utf-8")
+    raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+
+
+_worker_generators = {}
+
+
+def _reset_after_fork() -> None:
+    # A forked worker starts with copies of the parent's samplers; replaying
+    # their buffered bytes would repeat passwords across processes
+    for sampler in list(_samplers):
+        sampler.reset()
+    _worker_generators.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def generate_chunk(spec: PasswordSpec, fmt: str, count: int) -> bytes:
+    """Generate and render one chunk; entry point for process pool workers"""
+    generator = _worker_generators.get(spec)
+    if generator is None:
+        generator = _worker_generators[spec] = BulkGenerator(spec)
+    return format_passwords(generator.generate(count), fmt)
+
+
+def _chunk_sizes(count: int, chunk_size: int) -> Iterator[int]:
+    while count > 0:
+        yield min(chunk_size, count)
+        count -= chunk_size
+
+
+def run_ordered(task: Callable[..., Any],
+                task_args: Iterable[Tuple],
+                on_result: Callable[[Any], None],
+                workers: Optional[int] = None) -> None:
+    """
+    Run task(*args) for each argument tuple in worker processes and hand
+    the results to on_result in submission order
+
+    At most two tasks per worker are in flight, so memory does not grow
+    with the number of tasks, and task_args may be a lazy iterator.
+
+    Args:
+        task: Picklable function run in the workers
+        task_args: Argument tuples, one per task
+        on_result: Called in this process with each result, in order
+        workers: Worker processes; 0 or 1 runs in this process, None uses
+            every CPU
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for args in task_args:
+            on_result(task(*args))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight: Deque["Future[Any]"] = deque()
+        for args in task_args:
+            if len(in_flight) >= workers * 2:
+                on_result(in_flight.popleft().result())
+            in_flight.append(executor.submit(task, *args))
+        while in_flight:
+            on_result(in_flight.popleft().result())
+
+
+def stream_chunks(out: BinaryIO,
+                  task: Callable[..., bytes],
+                  args: Tuple,
+                  count: int,
+                  workers: Optional[int] = None,
+                  chunk_size: int = CHUNK_SIZE,
+                  progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Write the output of task(*args, size) for chunks totalling count items,
+    generated in worker processes and written in order (see run_ordered)
+
+    Args:
+        out: Binary stream to write to (file or sys.stdout.buffer)
+        task: Picklable function returning the rendered bytes for one chunk
+        args: Arguments passed to task before the chunk size
+        count: Number of items
+        workers: Worker processes; 0 or 1 generates in this process,
+            None uses every CPU
+        chunk_size: Items per worker task
+        progress: Called with the number of items written so far
+
+    Returns:
+        Number of items written
+    """
+    written = 0
+    # Results arrive in order, so their sizes come from a second pass over the chunk sizes
+    sizes = _chunk_sizes(count, chunk_size)
+
+    def write(data: bytes) -> None:
+        nonlocal written
+        out.write(data)
+        written += next(sizes)
+        if progress is not None:
+            progress(written)
+
+    run_ordered(task, ((*args, size) for size in _chunk_sizes(count, chunk_size)), write, workers)
+    return written
+
+
+def stream_passwords(out: BinaryIO,
+                     spec: PasswordSpec,
+                     count: int,
+                     fmt: str = "plain",
+                     workers: Optional[int] = None,
+                     chunk_size: int = CHUNK_SIZE,
+                     progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Write count passwords to a binary stream, generated in parallel chunks
+    (see stream_chunks)
+
+    Args:
+        out: Binary stream to write to (file or sys.stdout.buffer)
+        spec: Pools built with build_spec
+        count: Number of passwords
+        fmt: "plain" (one per line) or "jsonl"
+        workers: Worker processes; 0 or 1 generates in this process,
+            None uses every CPU
+        chunk_size: Passwords per worker task
+        progress: Called with the number of passwords written so far
+
+    Returns:
+        Number of passwords written
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    return stream_chunks(out, generate_chunk, (spec, fmt), count, workers, chunk_size, progress)
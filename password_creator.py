@@ -9,18 +9,99 @@ import string
 import secrets
 import argparse
 import json
-from typing import List, Dict, Any
+import os
+import sys
+import time
+from typing import TYPE_CHECKING, BinaryIO, Callable, List, Dict, Any, Optional, Tuple
+
+if TYPE_CHECKING:
+    from wordlist import PassphraseOptions
+
+
+# Built-in passphrase words; see --wordlist for larger lists
+COMMON_WORDS = [
+    "apple", "brave", "cloud", "dream", "eagle", "flame", "grace", "happy",
+    "magic", "ocean", "piano", "quiet", "river", "smile", "tiger", "unity",
+    "village", "wonder", "yellow", "zebra", "anchor", "bright", "castle",
+    "dolphin", "forest", "guitar", "honey", "island", "jungle", "knight",
+    "lemon", "mountain", "nature", "orange", "purple", "rescue", "sunset",
+    "travel", "unique", "victory", "wisdom", "galaxy", "thunder", "rainbow"
+]
+
+# From this many passwords, generate_multiple_passwords uses the bulk engine
+BULK_THRESHOLD = 1000
+
+
+def score_password(length: int,
+                   has_lower: bool,
+                   has_upper: bool,
+                   has_digit: bool,
+                   has_special: bool,
+                   breached: bool = False) -> Tuple[int, str, List[str]]:
+    """
+    Score a password from its length and character classes
+    
+    A password on a breached or common password list scores 0 whatever
+    its length and variety.
+    
+    Returns:
+        (score out of 6, strength label, improvement suggestions)
+    """
+    score = 0
+    feedback = []
+    
+    # Length check
+    if length >= 12:
+        score += 2
+    elif length >= 8:
+        score += 1
+    else:
+        feedback.append("Password should be at least 8 characters long")
+        
+    # Character variety checks
+    score += sum([has_lower, has_upper, has_digit, has_special])
+    
+    if not has_lower:
+        feedback.append("Add lowercase letters")
+    if not has_upper:
+        feedback.append("Add uppercase letters")
+    if not has_digit:
+        feedback.append("Add numbers")
+    if not has_special:
+        feedback.append("Add special characters")
+        
+    if breached:
+        score = 0
+        feedback.insert(0, "This password is on a list of breached or common passwords")
+        
+    # Determine strength level
+    if score >= 6:
+        strength = "Very Strong"
+    elif score >= 4:
+        strength = "Strong"
+    elif score >= 2:
+        strength = "Medium"
+    else:
+        strength = "Weak"
+    
+    return score, strength, feedback
 
 
 class PasswordCreator:
     """A secure password generator with customizable options"""
     
-    def __init__(self):
+    def __init__(self, breach_filter: Optional[str] = None):
+        """
+        Args:
+            breach_filter: Breached password filter built with breach_filter.py
+                (default: the PASSWORD_BREACH_FILTER environment variable)
+        """
         self.lowercase = string.ascii_lowercase
         self.uppercase = string.ascii_uppercase
         self.digits = string.digits
         self.special_chars = "!@#$%^&*()_+-=[]{}|;:,.<>?"
         self.ambiguous_chars = "0O1lI"  # Characters that might be confusing
+        self.breach_filter = breach_filter or os.getenv("PASSWORD_BREACH_FILTER") or None
         
     def generate_password(self, 
                          length: int = 12,
@@ -108,7 +189,8 @@ class PasswordCreator:
                            word_count: int = 4,
                            separator: str = "-",
                            capitalize: bool = True,
-                           add_numbers: bool = False) -> str:
+                           add_numbers: bool = False,
+                           wordlist: Optional[str] = None) -> str:
         """
         Generate a memorable passphrase using common words
         
@@ -117,32 +199,17 @@ class PasswordCreator:
             separator: Character to separate words
             capitalize: Capitalize first letter of each word
             add_numbers: Add random numbers to the passphrase
+            wordlist: Wordlist index or plain wordlist file (default: the
+                built-in list); loaded once and reused
             
         Returns:
             Generated passphrase string
         """
-        # Common words for passphrases (you can expand this list)
-        words = [
-            "apple", "brave", "cloud", "dream", "eagle", "flame", "grace", "happy",
-            "magic", "ocean", "piano", "quiet", "river", "smile", "tiger", "unity",
-            "village", "wonder", "yellow", "zebra", "anchor", "bright", "castle",
-            "dolphin", "forest", "guitar", "honey", "island", "jungle", "knight",
-            "lemon", "mountain", "nature", "orange", "purple", "rescue", "sunset",
-            "travel", "unique", "victory", "wisdom", "galaxy", "thunder", "rainbow"
-        ]
-        
-        selected_words = [secrets.choice(words) for _ in range(word_count)]
+        # Imported here: wordlist builds on this module
+        from wordlist import PassphraseOptions, passphrase_generator
         
-        if capitalize:
-            selected_words = [word.capitalize() for word in selected_words]
-            
-        passphrase = separator.join(selected_words)
-        
-        if add_numbers:
-            numbers = ''.join(str(secrets.randbelow(10)) for _ in range(2))
-            passphrase += separator + numbers
-            
-        return passphrase
+        options = PassphraseOptions(wordlist, word_count, separator, capitalize, add_numbers)
+        return passphrase_generator(options).generate(1)[0]
     
     def check_password_strength(self, password: str) -> Dict[str, Any]:
         """
@@ -154,44 +221,16 @@ class PasswordCreator:
         Returns:
             Dictionary with strength analysis
         """
-        score = 0
-        feedback = []
-        
-        # Length check
-        if len(password) >= 12:
-            score += 2
-        elif len(password) >= 8:
-            score += 1
-        else:
-            feedback.append("Password should be at least 8 characters long")
-            
-        # Character variety checks
         has_lower = any(c.islower() for c in password)
         has_upper = any(c.isupper() for c in password)
         has_digit = any(c.isdigit() for c in password)
         has_special = any(c in self.special_chars for c in password)
         
-        variety_count = sum([has_lower, has_upper, has_digit, has_special])
-        score += variety_count
+        breached = self.is_breached(password)
         
-        if not has_lower:
-            feedback.append("Add lowercase letters")
-        if not has_upper:
-            feedback.append("Add uppercase letters")
-        if not has_digit:
-            feedback.append("Add numbers")
-        if not has_special:
-            feedback.append("Add special characters")
-            
-        # Determine strength level
-        if score >= 6:
-            strength = "Very Strong"
-        elif score >= 4:
-            strength = "Strong"
-        elif score >= 2:
-            strength = "Medium"
-        else:
-            strength = "Weak"
+        score, strength, feedback = score_password(
+            len(password), has_lower, has_upper, has_digit, has_special, bool(breached)
+        )
             
         return {
             "score": score,
@@ -202,16 +241,130 @@ class PasswordCreator:
             "has_uppercase": has_upper,
             "has_digits": has_digit,
             "has_special": has_special,
+            "breached": breached,
             "length": len(password)
         }
     
+    def is_breached(self, password: str) -> Optional[bool]:
+        """
+        Look a password up in the breached password filter
+        
+        Returns:
+            True if it is listed (or a rare false positive), False if not,
+            None when no filter is configured
+        """
+        if not self.breach_filter:
+            return None
+        # Imported here so the filter module is only loaded when one is configured
+        from breach_filter import open_filter
+        return password in open_filter(self.breach_filter)
+    
     def generate_multiple_passwords(self, count: int = 5, **kwargs) -> List[str]:
         """Generate multiple passwords with the same criteria"""
+        if count >= BULK_THRESHOLD:
+            # Imported here: password_bulk builds on this module
+            from password_bulk import BulkGenerator, build_spec
+            return BulkGenerator(build_spec(**kwargs)).generate(count)
         return [self.generate_password(**kwargs) for _ in range(count)]
 
 
+def _write_to(path: str, write: Callable[[BinaryIO], int], noun: str):
+    """Run write on a file, or stdout for "-", and report the rate to stderr"""
+    start = time.perf_counter()
+    if path == "-":
+        written = write(sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+    else:
+        with open(path, "wb", buffering=1 << 20) as out:
+            written = write(out)
+    elapsed = time.perf_counter() - start
+    rate = written / elapsed if elapsed > 0 else float("inf")
+    target = "stdout" if path == "-" else path
+    print(f"✅ Wrote {written:,} {noun}(s) to {target} in {elapsed:.2f}s ({rate:,.0f}/s)", file=sys.stderr)
+
+
+def write_passwords(path: str, count: int, options: Dict[str, Any], fmt: str = "plain", workers: Optional[int] = None):
+    """Stream count passwords to a file, or stdout for "-", reporting to stderr"""
+    from password_bulk import build_spec, stream_passwords
+    
+    spec = build_spec(**options)
+    _write_to(path, lambda out: stream_passwords(out, spec, count, fmt=fmt, workers=workers), "password")
+
+
+def write_passphrases(path: str, count: int, options: "PassphraseOptions", fmt: str = "plain",
+                      workers: Optional[int] = None):
+    """Stream count passphrases to a file, or stdout for "-", with an entropy report on stderr"""
+    from wordlist import passphrase_generator, stream_passphrases
+    
+    report = passphrase_generator(options).report()
+    _write_to(path, lambda out: stream_passphrases(out, options, count, fmt=fmt, workers=workers), "passphrase")
+    print(f"🎲 Entropy: {report['entropy_bits']} bits per passphrase "
+          f"({options.word_count} words × {report['bits_per_word']} bits from a "
+          f"{report['words']:,}-word list{', plus 2 digits' if options.add_numbers else ''})", file=sys.stderr)
+
+
+def audit_passwords(path: str,
+                    output: Optional[str] = None,
+                    summary_path: Optional[str] = None,
+                    workers: Optional[int] = None,
+                    include_passwords: bool = True,
+                    breach_filter: Optional[str] = None):
+    """Audit a password file, streaming JSONL records to output and printing histograms"""
+    from password_audit import audit_file
+    
+    start = time.perf_counter()
+    if output == "-":
+        summary = audit_file(path, sys.stdout.buffer, workers=workers, include_passwords=include_passwords,
+                             breach_filter=breach_filter)
+        sys.stdout.buffer.flush()
+    elif output:
+        with open(output, "wb", buffering=1 << 20) as out:
+            summary = audit_file(path, out, workers=workers, include_passwords=include_passwords,
+                                 breach_filter=breach_filter)
+    else:
+        summary = audit_file(path, workers=workers, breach_filter=breach_filter)
+    elapsed = time.perf_counter() - start
+    
+    report = summary.as_dict()
+    if summary_path:
+        with open(summary_path, "w") as f:
+            json.dump(report, f, indent=2)
+    
+    # Keep stdout clean for the records when they go there
+    stream = sys.stderr if output == "-" else sys.stdout
+    total = report["passwords"]
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    print(f"\n🔍 Password Audit for: {'stdin' if path == '-' else path}", file=stream)
+    print("=" * 50, file=stream)
+    print(f"Passwords: {total:,} in {elapsed:.2f}s ({rate:,.0f}/s)", file=stream)
+    print(f"Blank lines skipped: {report['blank_lines']:,}", file=stream)
+    print(f"Non-ASCII passwords: {report['non_ascii']:,}", file=stream)
+    if report["breached"] is not None:
+        share = report["breached"] / total if total else 0
+        print(f"In breach list: {report['breached']:,} ({share:.1%})", file=stream)
+    
+    def histogram(title: str, counts: Dict[str, int]):
+        print(f"\n{title}:", file=stream)
+        for label, n in counts.items():
+            share = n / total if total else 0
+            print(f"  {label:<22}{n:>12,}{share:>8.1%}  {'█' * round(share * 30)}", file=stream)
+    
+    histogram("Strength", report["strength"])
+    histogram("Score (out of 6)", report["score"])
+    lengths = {"1-7": 0, "8-11": 0, "12-15": 0, "16+": 0}
+    for length, n in report["length"].items():
+        length = int(length)
+        bucket = "1-7" if length < 8 else "8-11" if length < 12 else "12-15" if length < 16 else "16+"
+        lengths[bucket] += n
+    histogram("Length", lengths)
+    histogram("Has character class", report["character_classes"])
+
+
 def main():
     """Command line interface for the password creator"""
+    # Imported here rather than at module level: wordlist builds on this module
+    from wordlist import PassphraseOptions, passphrase_generator
+    
     parser = argparse.ArgumentParser(description="Secure Password Generator")
     
     # Password generation options
@@ -232,6 +385,14 @@ def main():
     parser.add_argument("--custom-chars", type=str, default="",
                        help="Additional custom characters to include")
     
+    # Bulk output options
+    parser.add_argument("-o", "--output", type=str,
+                       help="Stream passwords or passphrases (or --audit records as JSONL) to this file ('-' for stdout)")
+    parser.add_argument("--format", choices=["plain", "jsonl"], default="plain",
+                       help="Output format with --output (default: plain)")
+    parser.add_argument("--workers", type=int,
+                       help="Worker processes for --output and --audit (default: one per CPU)")
+    
     # Passphrase options
     parser.add_argument("-p", "--passphrase", action="store_true",
                        help="Generate passphrase instead of password")
@@ -239,14 +400,56 @@ def main():
                        help="Number of words in passphrase (default: 4)")
     parser.add_argument("-s", "--separator", type=str, default="-",
                        help="Separator for passphrase words (default: -)")
+    parser.add_argument("--wordlist", type=str,
+                       help="Passphrase wordlist: an index built with wordlist.py or a plain list "
+                            "(default: the built-in list)")
     
     # Analysis options
     parser.add_argument("--analyze", type=str,
                        help="Analyze strength of provided password")
+    parser.add_argument("--audit", type=str, metavar="FILE",
+                       help="Analyze every password in FILE, one per line ('-' for stdin)")
+    parser.add_argument("--summary", type=str,
+                       help="Write the --audit histograms as JSON to this file")
+    parser.add_argument("--omit-passwords", action="store_true",
+                       help="Leave the passwords themselves out of --audit records")
+    parser.add_argument("--breach-filter", type=str, default=os.getenv("PASSWORD_BREACH_FILTER"),
+                       help="Breached password filter for --analyze and --audit "
+                            "(default: $PASSWORD_BREACH_FILTER)")
     
     args = parser.parse_args()
     
-    creator = PasswordCreator()
+    creator = PasswordCreator(breach_filter=args.breach_filter)
+    
+    # Audit mode
+    if args.audit:
+        audit_passwords(args.audit, args.output, args.summary, args.workers, not args.omit_passwords,
+                        args.breach_filter)
+        return
+    
+    # Bulk output mode
+    if args.output and args.passphrase:
+        options = PassphraseOptions(args.wordlist, args.words, args.separator, True, True)
+        try:
+            write_passphrases(args.output, args.count, options, fmt=args.format, workers=args.workers)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        return
+    if args.output and not args.analyze:
+        options = {
+            'length': args.length,
+            'use_uppercase': not args.no_uppercase,
+            'use_lowercase': not args.no_lowercase,
+            'use_digits': not args.no_digits,
+            'use_special': not args.no_special,
+            'exclude_ambiguous': args.exclude_ambiguous,
+            'custom_chars': args.custom_chars
+        }
+        try:
+            write_passwords(args.output, args.count, options, fmt=args.format, workers=args.workers)
+        except ValueError as e:
+            parser.error(str(e))
+        return
     
     # Password analysis mode
     if args.analyze:
@@ -259,6 +462,8 @@ def main():
         print(f"Has uppercase: {'✓' if analysis['has_uppercase'] else '✗'}")
         print(f"Has digits: {'✓' if analysis['has_digits'] else '✗'}")
         print(f"Has special chars: {'✓' if analysis['has_special'] else '✗'}")
+        if analysis['breached'] is not None:
+            print(f"Not in breach list: {'✗' if analysis['breached'] else '✓'}")
         
         if analysis['feedback']:
             print("\n💡 Suggestions for improvement:")
@@ -271,19 +476,26 @@ def main():
     
     # Passphrase generation mode
     if args.passphrase:
+        try:
+            # Loads the wordlist once; the loop below draws from the same cached generator
+            generator = passphrase_generator(PassphraseOptions(args.wordlist, args.words, args.separator, True, True))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
         print(f"Generating {args.count} passphrase(s):\n")
         for i in range(args.count):
             passphrase = creator.generate_passphrase(
                 word_count=args.words,
                 separator=args.separator,
-                add_numbers=True
+                add_numbers=True,
+                wordlist=args.wordlist
             )
             print(f"{i+1}. {passphrase}")
             
             # Show strength analysis for first passphrase
             if i == 0:
                 analysis = creator.check_password_strength(passphrase)
-                print(f"   Strength: {analysis['strength']} ({analysis['length']} characters)")
+                print(f"   Strength: {analysis['strength']} ({analysis['length']} characters, "
+                      f"{generator.entropy_bits:.1f} bits of entropy)")
     
     # Password generation mode
     else:
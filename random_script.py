@@ -8,6 +8,35 @@ import random
 import datetime
 import json
 import os
+import sys
+import time
+import argparse
+import string
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count as count_from, repeat
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only --numpy needs it
+    np = None
+
+# Records generated per worker task
+CHUNK_SIZE = 50000
+
+# (F(n), F(n+1)) pairs kept by fibonacci(n, memo=True), most recently used last
+FIB_CACHE_SIZE = 256
+# A cached pair at most this far from n is stepped to it with additions,
+# which cost far less than the multiplications of a fresh computation
+FIB_STEP_LIMIT = 64
+_fib_memo = OrderedDict()
+
+FIELDS = ["timestamp", "random_number", "random_string", "random_list", "random_float"]
+
+# Same layout as json.dumps(generate_random_data()) and its CSV equivalent
+JSONL_TEMPLATE = ('{"timestamp": "%s", "random_number": %d, "random_string": "%s", '
+                  '"random_list": [%d, %d, %d, %d, %d], "random_float": %r}\n')
+CSV_TEMPLATE = '%s,%d,%s,"[%d, %d, %d, %d, %d]",%r\n'
 
 def generate_random_data():
     """Generate some random data"""
@@ -20,6 +49,98 @@ def generate_random_data():
     }
     return data
 
+def _chunk_columns_python(rng, count):
+    """Columns of count records drawn from a random.Random"""
+    numbers = rng.choices(range(1, 1001), k=count)
+    letters = ''.join(rng.choices(string.ascii_lowercase, k=count * 10))
+    strings = [letters[i:i + 10] for i in range(0, len(letters), 10)]
+    values = rng.choices(range(1, 101), k=count * 5)
+    lists = [values[i::5] for i in range(5)]
+    floats = [round(rng.random(), 4) for _ in range(count)]
+    return numbers, strings, lists, floats
+
+def _chunk_columns_numpy(rng, count):
+    """Columns of count records drawn from a numpy Generator, a whole column at a time"""
+    numbers = rng.integers(1, 1001, count).tolist()
+    letters = (rng.integers(0, 26, count * 10, dtype=np.uint8) + ord('a')).tobytes().decode('ascii')
+    strings = [letters[i:i + 10] for i in range(0, len(letters), 10)]
+    values = rng.integers(1, 101, (5, count)).tolist()
+    # Python's round, not numpy's, so values match the pure Python engine's formatting
+    floats = list(map(round, rng.random(count).tolist(), repeat(4)))
+    return numbers, strings, values, floats
+
+def generate_chunk(index, count, fmt="jsonl", seed=None, use_numpy=False):
+    """
+    Generate and render one chunk of records; entry point for worker processes
+    
+    Each chunk gets its own generator, seeded from (seed, index) when a seed
+    is given, so the output is the same whatever the number of workers.
+    Records in a chunk share one timestamp.
+    """
+    if use_numpy:
+        rng = np.random.default_rng(None if seed is None else [seed, index])
+        numbers, strings, lists, floats = _chunk_columns_numpy(rng, count)
+    else:
+        rng = random.Random(None if seed is None else f"{seed}:{index}")
+        numbers, strings, lists, floats = _chunk_columns_python(rng, count)
+    template = CSV_TEMPLATE if fmt == "csv" else JSONL_TEMPLATE
+    timestamp = datetime.datetime.now().isoformat()
+    rows = zip(repeat(timestamp), numbers, strings, *lists, floats)
+    return ''.join(map(template.__mod__, rows)).encode('ascii')
+
+def generate_records(out, count, fmt="jsonl", seed=None, use_numpy=False, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Stream count records to a binary file as JSONL or CSV
+    
+    Chunks are generated in worker processes and written in order, with at
+    most two chunks per worker in flight, so memory stays flat.
+    
+    Returns:
+        Number of records written
+    """
+    if use_numpy and np is None:
+        raise RuntimeError("NumPy is not installed (pip install numpy)")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if fmt == "csv":
+        out.write((','.join(FIELDS) + '\n').encode('ascii'))
+    sizes = [(i, min(chunk_size, count - start)) for i, start in enumerate(range(0, count, chunk_size))]
+    
+    if workers <= 1:
+        for index, size in sizes:
+            out.write(generate_chunk(index, size, fmt, seed, use_numpy))
+        return count
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for index, size in sizes:
+            if len(in_flight) >= workers * 2:
+                out.write(in_flight.popleft().result())
+            in_flight.append(executor.submit(generate_chunk, index, size, fmt, seed, use_numpy))
+        while in_flight:
+            out.write(in_flight.popleft().result())
+    return count
+
+def bulk_main(args):
+    """Generate args.records records and report the rate"""
+    path = args.output or f"random_records_{random.randint(1000, 9999)}.{args.format}"
+    start = time.perf_counter()
+    if path == "-":
+        written = generate_records(sys.stdout.buffer, args.records, args.format, args.seed, args.numpy, args.workers)
+        sys.stdout.buffer.flush()
+    else:
+        with open(path, 'wb', buffering=1 << 20) as f:
+            written = generate_records(f, args.records, args.format, args.seed, args.numpy, args.workers)
+    elapsed = time.perf_counter() - start
+    
+    # Keep stdout clean when the records go there
+    report = sys.stderr if path == "-" else sys.stdout
+    rate = written / elapsed if elapsed > 0 else float('inf')
+    print(f"📊 Generated {written:,} records in {elapsed:.2f}s ({rate:,.0f} records/sec)", file=report)
+    if path != "-":
+        print(f"📁 Created file: {path}", file=report)
+        print(f"📏 File size: {os.path.getsize(path):,} bytes", file=report)
+
 def calculate_fibonacci(n):
     """Calculate Fibonacci sequence up to n terms"""
     if n <= 0:
@@ -34,7 +155,89 @@ def calculate_fibonacci(n):
         fib.append(fib[i-1] + fib[i-2])
     return fib
 
+def _fib_pair(n):
+    """(F(n), F(n+1)) by fast doubling, walking the bits of n from the top"""
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        # F(2k) = F(k) * (2F(k+1) - F(k)),  F(2k+1) = F(k)^2 + F(k+1)^2
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        a, b = (d, c + d) if bit == '1' else (c, d)
+    return a, b
+
+def _fib_pair_cached(n):
+    """_fib_pair, reusing the nearest cached pair when it is within FIB_STEP_LIMIT of n"""
+    nearest = min(_fib_memo, key=lambda k: abs(k - n), default=None)
+    if nearest is not None and abs(nearest - n) <= FIB_STEP_LIMIT:
+        a, b = _fib_memo[nearest]
+        for _ in range(n - nearest):
+            a, b = b, a + b
+        for _ in range(nearest - n):
+            a, b = b - a, a
+    else:
+        a, b = _fib_pair(n)
+    _fib_memo[n] = (a, b)
+    _fib_memo.move_to_end(n)
+    if len(_fib_memo) > FIB_CACHE_SIZE:
+        _fib_memo.popitem(last=False)
+    return a, b
+
+def fibonacci(n, memo=False):
+    """
+    The n-th Fibonacci number, F(0) = 0, F(1) = 1, in O(log n) big-integer
+    multiplications
+    
+    Args:
+        n: Index of the term (calculate_fibonacci(n)[-1] is fibonacci(n - 1))
+        memo: Keep the last FIB_CACHE_SIZE results, so repeated n and n
+            within FIB_STEP_LIMIT of a cached one cost only additions;
+            clear with _fib_memo.clear()
+    """
+    if not isinstance(n, int) or n < 0:
+        raise ValueError("n must be a non-negative integer")
+    return (_fib_pair_cached(n) if memo else _fib_pair(n))[0]
+
+def iter_fibonacci(count=None, start=0):
+    """
+    Stream Fibonacci numbers F(start), F(start + 1), ... holding only two terms
+    
+    Args:
+        count: Number of terms, or None to go on forever
+        start: Index of the first term; reached by fast doubling, not by
+            stepping through the terms before it
+    """
+    a, b = _fib_pair(start) if start else (0, 1)
+    for _ in (count_from() if count is None else range(count)):
+        yield a
+        a, b = b, a + b
+
 def main():
+    parser = argparse.ArgumentParser(description="Random Script Generator")
+    parser.add_argument("-n", "--records", type=int,
+                        help="Generate this many random records in bulk instead of the demo")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl",
+                        help="Bulk output format (default: jsonl)")
+    parser.add_argument("-o", "--output", type=str,
+                        help="Bulk output file, '-' for stdout (default: random_records_<n>.<format>)")
+    parser.add_argument("--seed", type=int,
+                        help="Seed for reproducible records (timestamps still vary)")
+    parser.add_argument("--numpy", action="store_true",
+                        help="Draw records with NumPy's vectorized generator")
+    parser.add_argument("--workers", type=int,
+                        help="Worker processes for bulk mode (default: one per CPU)")
+    args = parser.parse_args()
+    
+    if args.records is not None:
+        if args.records < 1:
+            parser.error("--records must be at least 1")
+        if args.seed is not None and args.seed < 0:
+            parser.error("--seed must not be negative")
+        try:
+            bulk_main(args)
+        except RuntimeError as e:
+            parser.error(str(e))
+        return
+    
     print("🎲 Random Script Generator 🎲")
     print("=" * 40)
     
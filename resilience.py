@@ -0,0 +1,284 @@
+"""
+Client-side protection for upstream HTTP calls.
+
+UpstreamGuard combines a per-host token-bucket rate limiter, retries with
+jittered exponential backoff inside a per-request time budget, and a
+per-host circuit breaker that fails fast while an origin is down.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limited or a transient server failure
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of sending a request that cannot succeed in time"""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """The host's circuit breaker is open"""
+
+    def __init__(self, host: str):
+        super().__init__(f"{host} is failing; circuit breaker open")
+        self.host = host
+
+
+class BudgetExceededError(UpstreamUnavailable):
+    """The rate limiter could not admit the request within its time budget"""
+
+    def __init__(self, host: str):
+        super().__init__(f"rate limit for {host} leaves no time within the request budget")
+        self.host = host
+
+
+class TokenBucket:
+    """Admits `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, deadline: float) -> Optional[float]:
+        """
+        Take one token, waiting for it if necessary
+
+        Args:
+            deadline: time.monotonic() value by which the token must be granted
+
+        Returns:
+            Seconds spent waiting, or None if the wait would run past the deadline
+        """
+        if self.rate <= 0:
+            return 0.0
+        async with self._lock:
+            self._refill()
+            wait = 0.0
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                if time.monotonic() + wait > deadline:
+                    return None
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= 1
+            return wait
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. Once `reset_timeout`
+    has passed a single probe request is let through: success closes the
+    circuit, failure keeps it open for another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if self._probe_started is not None else "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at < self.reset_timeout:
+            return False
+        # Allow one probe at a time; a probe whose caller vanished expires
+        if self._probe_started is None or now - self._probe_started >= self.reset_timeout:
+            self._probe_started = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probe_started is not None or self.failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+            self._opened_at = time.monotonic()
+            self._probe_started = None
+
+
+class GuardStats:
+    """Counters for an UpstreamGuard"""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.rejected = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+        }
+
+
+class UpstreamGuard:
+    """Rate limiting, retries and circuit breaking for one class of upstream hosts"""
+
+    def __init__(self,
+                 rate: float = 5.0,
+                 burst: int = 10,
+                 max_attempts: int = 3,
+                 base_delay: float = 0.25,
+                 max_delay: float = 4.0,
+                 budget: float = 15.0,
+                 attempt_timeout: float = 10.0,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        """
+        Args:
+            rate: Requests per second allowed to each host (0 disables limiting)
+            burst: Requests a host may receive back to back
+            max_attempts: Attempts per request, including the first
+            base_delay: Backoff before the first retry; doubles on each retry
+            max_delay: Upper bound on a single backoff
+            budget: Seconds a request may take across all attempts and waits
+            attempt_timeout: Timeout of a single attempt
+            failure_threshold: Consecutive failures that open a host's circuit
+            reset_timeout: Seconds an open circuit waits before probing again
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.attempt_timeout = attempt_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.stats = GuardStats()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+        if retry_after.isdigit():
+            return float(retry_after)
+        # Full jitter keeps retrying clients from synchronising
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def open_circuits(self) -> Dict[str, str]:
+        """Hosts whose circuit is not closed, with their state"""
+        return {host: b.state for host, b in self._breakers.items() if b.state != "closed"}
+
+    async def send(self,
+                   client: httpx.AsyncClient,
+                   method: str,
+                   url: str,
+                   stream: bool = False,
+                   **kwargs: Any) -> httpx.Response:
+        """
+        Send a request under the guard's policies
+
+        Retryable responses that remain after the last attempt are returned,
+        so the caller's raise_for_status() still reports them.
+
+        Args:
+            client: Client to send with
+            method: HTTP method
+            url: Request URL
+            stream: Return without reading the body; the caller must close it
+            **kwargs: Passed to client.build_request (headers, data, ...)
+
+        Returns:
+            The final response
+
+        Raises:
+            CircuitOpenError: The host is failing and was not contacted
+            BudgetExceededError: The rate limit left no time for the request
+            httpx.HTTPError: Transport errors persisting after the last attempt
+        """
+        host = httpx.URL(url).host
+        breaker = self.breaker(host)
+        deadline = time.monotonic() + self.budget
+        self.stats.requests += 1
+        attempt = 0
+
+        while True:
+            attempt += 1
+            if not breaker.allow():
+                self.stats.rejected += 1
+                raise CircuitOpenError(host)
+            waited = await self._bucket(host).acquire(deadline)
+            if waited is None:
+                self.stats.rejected += 1
+                raise BudgetExceededError(host)
+            if waited:
+                self.stats.throttled += 1
+
+            remaining = deadline - time.monotonic()
+            request = client.build_request(
+                method, url, timeout=max(min(self.attempt_timeout, remaining), 0.1), **kwargs
+            )
+            response = None
+            try:
+                response = await client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                error: Optional[Exception] = e
+            else:
+                error = None
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                # 429 means the host is alive but busy; only 5xx counts against it
+                if response.status_code >= 500:
+                    breaker.record_failure()
+
+            delay = self._backoff(attempt, response)
+            if attempt >= self.max_attempts or time.monotonic() + delay >= deadline:
+                if error is not None:
+                    raise error
+                return response
+
+            if response is not None:
+                await response.aclose()
+            self.stats.retries += 1
+            reason = error or f"HTTP {response.status_code}"
+            logger.info(f"Retrying {url} in {delay:.2f}s after {reason}")
+            await asyncio.sleep(delay)
@@ -0,0 +1,54 @@
+"""
+In-flight request coalescing.
+
+Concurrent calls for the same key share one underlying coroutine, so a
+burst of identical searches or page fetches costs a single upstream request.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its result"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await fn(), or join the call already running for key
+
+        A caller that is cancelled stops waiting without cancelling the
+        shared call, which other callers may still depend on.
+
+        Args:
+            key: Identity of the request
+            fn: Coroutine factory performing the request
+
+        Returns:
+            Result of the shared call
+        """
+        self.calls += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Hashable, future: "asyncio.Future[Any]") -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved when every caller has gone away
+            future.exception()
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
@@ -0,0 +1,206 @@
+"""
+Query-aware content windowing.
+
+Rather than returning the first N characters of a page (usually navigation
+and introductory text), select_window ranks the page's heading-delimited
+sections against the query with BM25 and returns the best ones, in document
+order, within a character budget.
+"""
+
+import bisect
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# A query term in a section heading counts this many times
+HEADING_WEIGHT = 3
+
+# Fragments shorter than this are not worth including
+MIN_FRAGMENT_CHARS = 200
+
+SKIPPED_MARKER = "[…]"
+SEPARATOR = "\n\n"
+
+_WORD = re.compile(r"\w+")
+
+
+def stem(term: str) -> str:
+    """Crude plural folding so "models" matches "model" """
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def query_pattern(query: str) -> Optional[Pattern[str]]:
+    """
+    Regex matching any query term (or its plural) as a whole word in
+    lowercased text, or None for a query without terms
+
+    Matching with one compiled regex keeps scoring in C; tokenizing whole
+    pages in Python costs tens of milliseconds per large page.
+    """
+    terms = sorted({stem(term) for term in _WORD.findall(query.lower())}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile(r"\b(" + "|".join(map(re.escape, terms)) + r")s?\b")
+
+
+def term_counts(pattern: Pattern[str], text: str) -> Dict[str, int]:
+    return Counter(pattern.findall(text.lower()))
+
+
+def score_sections(query: str, sections: List[Tuple[str, str]]) -> List[float]:
+    """
+    BM25 score of each section for the query, treating the page's sections
+    as the document collection; section length is measured in characters
+
+    Args:
+        query: Free-text query
+        sections: (heading, text) pairs
+
+    Returns:
+        One score per section; 0 for sections without any query term
+    """
+    pattern = query_pattern(query)
+    if pattern is None or not sections:
+        return [0.0] * len(sections)
+
+    frequencies: List[Dict[str, int]] = []
+    lengths: List[int] = []
+    for heading, body in sections:
+        counts = term_counts(pattern, body)
+        for term, n in term_counts(pattern, heading).items():
+            counts[term] = counts.get(term, 0) + n * HEADING_WEIGHT
+        frequencies.append(counts)
+        lengths.append(len(heading) * HEADING_WEIGHT + len(body))
+
+    n = len(sections)
+    average_length = sum(lengths) / n or 1.0
+    document_frequency: Dict[str, int] = {}
+    for counts in frequencies:
+        for term in counts:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    idf = {
+        term: math.log(1 + (n - containing + 0.5) / (containing + 0.5))
+        for term, containing in document_frequency.items()
+    }
+
+    scores = []
+    for counts, length in zip(frequencies, lengths):
+        norm = K1 * (1 - B + B * length / average_length)
+        scores.append(sum(idf[t] * f * (K1 + 1) / (f + norm) for t, f in counts.items()))
+    return scores
+
+
+def best_fragment(query: str, text: str, size: int) -> str:
+    """
+    The stretch of text holding the most query term matches, widened to
+    word boundaries and at most size characters including its ellipses
+    """
+    if len(text) <= size:
+        return text
+    if size <= 4:
+        return ""
+    size -= 4
+    pattern = query_pattern(query)
+    positions = [m.start() for m in pattern.finditer(text.lower())] if pattern is not None else []
+
+    start = 0
+    best = 0
+    first = 0
+    for last, position in enumerate(positions):
+        while position - positions[first] > size:
+            first += 1
+        if last - first + 1 > best:
+            best = last - first + 1
+            # Lead in a little before the first match for context
+            start = max(0, positions[first] - size // 10)
+
+    start = min(start, len(text) - size)
+    end = start + size
+    if start > 0:
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < start + 50 else start
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        end = space if space > start else end
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if end < len(text) else ""
+    return prefix + text[start:end].strip() + suffix
+
+
+def render_section(heading: str, body: str) -> str:
+    return f"## {heading}\n{body}" if heading else body
+
+
+def select_window(query: str, sections: List[Tuple[str, str]], budget: int) -> str:
+    """
+    Return the sections that best match the query within a character budget
+
+    Sections are picked best score first until the budget is spent, then
+    shown in document order with a marker where sections were left out. A
+    section too long for the remaining budget is cut down to its stretch
+    with the most matches. Budget left after the matching sections goes to
+    the sections following the best match (the content under a matching
+    heading often sits in its subsections), then to the start of the page.
+
+    Args:
+        query: Free-text query
+        sections: (heading, text) pairs in document order
+        budget: Maximum characters to return
+
+    Returns:
+        Selected page text
+    """
+    if not sections:
+        return ""
+    scores = score_sections(query, sections)
+    ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])
+    best = ranked[0] if ranked else -1
+    # Without any match this is simply the page from the start
+    order = dict.fromkeys(ranked + list(range(best + 1, len(sections))) + list(range(best)))
+
+    chosen: Dict[int, str] = {}
+    positions: List[int] = []
+    # Length of the window so far; with nothing chosen the page is one skipped gap
+    used = len(SKIPPED_MARKER)
+    for i in order:
+        heading, body = sections[i]
+        at = bisect.bisect(positions, i)
+        before = positions[at - 1] if at else -1
+        after = positions[at] if at < len(positions) else len(sections)
+        # The section replaces the marker of the gap it falls in, leaving a
+        # marker for each side of the gap that stays non-empty
+        markers = (i - before > 1) + (after - i > 1)
+        layout = (markers - 1) * len(SKIPPED_MARKER) + markers * len(SEPARATOR)
+        room = budget - used - layout - len(render_section(heading, ""))
+        if room < MIN_FRAGMENT_CHARS and chosen:
+            if room <= 0:
+                break
+            # A short section may still fit even if a fragment would not
+            if len(body) > room:
+                continue
+        if room < 0:
+            continue
+        text = best_fragment(query, body, room) if len(body) > room else body
+        chosen[i] = render_section(heading, text)
+        bisect.insort(positions, i)
+        used += layout + len(chosen[i])
+
+    if not chosen:
+        return ""
+    parts = []
+    previous = -1
+    for i in positions:
+        if i != previous + 1:
+            parts.append(SKIPPED_MARKER)
+        parts.append(chosen[i])
+        previous = i
+    if previous != len(sections) - 1:
+        parts.append(SKIPPED_MARKER)
+    return SEPARATOR.join(parts)
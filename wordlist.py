@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Wordlist Index and Passphrase Engine
+Passphrases from wordlists of any size, such as EFF's 7,776-word list or
+custom lists with millions of entries
+
+A wordlist is built once into a compact index file: a header, an array of
+word offsets and the UTF-8 words back to back. The file is memory-mapped, so
+opening even a very large list is instant and only the pages touched are
+read. Word choices come from bulk os.urandom draws with rejection sampling,
+so every word is equally likely and each adds log2(list size) bits.
+"""
+
+import argparse
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Sequence
+
+from password_bulk import ByteSampler, FORMATS, format_passwords, stream_chunks
+from password_creator import COMMON_WORDS
+
+MAGIC = b"PWWORDS1"
+# magic, word count, blob size, offset width in bytes; padded to keep the offsets aligned
+HEADER = struct.Struct("<8sQQI4x")
+
+# Lists up to this size are decoded once into a Python list; larger ones are read from the map
+DECODE_LIMIT = 100_000
+
+# Passphrases generated per worker task
+CHUNK_SIZE = 20000
+
+
+def _offset_code(width: int) -> str:
+    """array typecode for offsets of width bytes"""
+    for code in ("I", "L", "Q"):
+        if array(code).itemsize == width:
+            return code
+    raise ValueError(f"Offsets of {width} bytes are not supported on this platform")
+
+
+class WordIndex:
+    """Words by position, from an index file or an in-memory list"""
+
+    def __init__(self, offsets: Sequence[int], blob, source: str = "", mm: Optional[mmap.mmap] = None):
+        self._offsets = offsets
+        self._blob = blob
+        self._mm = mm
+        self.source = source
+        self._words: Optional[List[str]] = None
+        if len(self) <= DECODE_LIMIT:
+            self._words = [self._word(i) for i in range(len(self))]
+
+    @classmethod
+    def from_words(cls, words: Sequence[str], source: str = "") -> "WordIndex":
+        """Index an in-memory list, dropping duplicates and blanks"""
+        unique = [w for w in dict.fromkeys(word.strip() for word in words) if w]
+        blob = bytearray()
+        offsets = array("Q", [0])
+        for word in unique:
+            blob += word.encode("utf-8")
+            offsets.append(len(blob))
+        return cls(offsets, bytes(blob), source)
+
+    @classmethod
+    def open(cls, path: str) -> "WordIndex":
+        """Memory-map an index file written by build_index"""
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mm) < HEADER.size:
+            raise ValueError(f"{path} is not a wordlist index")
+        magic, count, blob_size, width = HEADER.unpack_from(mm)
+        offsets_end = HEADER.size + (count + 1) * width
+        if magic != MAGIC or width not in (4, 8) or len(mm) < offsets_end + blob_size:
+            raise ValueError(f"{path} is not a wordlist index")
+        view = memoryview(mm)
+        code = _offset_code(width)
+        if sys.byteorder == "little":
+            offsets = view[HEADER.size:offsets_end].cast(code)
+        else:
+            # Index files are little-endian; big-endian machines read a swapped copy
+            offsets = array(code, view[HEADER.size:offsets_end])
+            offsets.byteswap()
+        return cls(offsets, view[offsets_end:offsets_end + blob_size], path, mm)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _word(self, i: int) -> str:
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]).decode("utf-8")
+
+    def __getitem__(self, i: int) -> str:
+        if self._words is not None:
+            return self._words[i]
+        return self._word(i)
+
+    def words_at(self, indices: Sequence[int]) -> List[str]:
+        """The words at many positions at once"""
+        if self._words is not None:
+            return list(map(self._words.__getitem__, indices))
+        return list(map(self._word, indices))
+
+    @property
+    def bits_per_word(self) -> float:
+        return math.log2(len(self)) if len(self) else 0.0
+
+
+def build_index(source_path: str, output_path: str) -> int:
+    """
+    Build an index file from a wordlist
+
+    Each non-blank line gives one word: its last whitespace-separated field,
+    so both plain lists and EFF's dice-numbered lists ("11111  abacus") work.
+    Duplicates are dropped, since they would make some words likelier.
+
+    Returns:
+        Number of words indexed
+    """
+    seen: Dict[str, None] = {}
+    with open(source_path, encoding="utf-8") as source:
+        for line in source:
+            fields = line.split()
+            if fields:
+                seen[fields[-1]] = None
+
+    blob_size = sum(len(word.encode("utf-8")) for word in seen)
+    offsets = array(_offset_code(4 if blob_size < 1 << 32 else 8), [0])
+    width = offsets.itemsize
+    position = 0
+    for word in seen:
+        position += len(word.encode("utf-8"))
+        offsets.append(position)
+    if sys.byteorder != "little":
+        offsets.byteswap()
+
+    with open(output_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, len(seen), blob_size, width))
+        offsets.tofile(out)
+        for word in seen:
+            out.write(word.encode("utf-8"))
+    return len(seen)
+
+
+_indexes: Dict[str, WordIndex] = {}
+
+
+def load_wordlist(path: Optional[str] = None) -> WordIndex:
+    """
+    A wordlist, loaded once per process
+
+    Args:
+        path: Index file from build_index, or a plain wordlist (read into
+            memory); None for the built-in list
+
+    Returns:
+        The word index
+    """
+    key = path or ""
+    index = _indexes.get(key)
+    if index is None:
+        if not path:
+            index = WordIndex.from_words(COMMON_WORDS, "built-in")
+        else:
+            with open(path, "rb") as f:
+                is_index = f.read(len(MAGIC)) == MAGIC
+            if is_index:
+                index = WordIndex.open(path)
+            else:
+                with open(path, encoding="utf-8") as f:
+                    index = WordIndex.from_words([line.split()[-1] for line in f if line.split()], path)
+        if not len(index):
+            raise ValueError(f"Wordlist {path or 'built-in'} has no words")
+        _indexes[key] = index
+    return index
+
+
+class IndexSampler:
+    """Uniform draws from range(n) for any n, taken from the OS in bulk"""
+
+    def __init__(self, n: int):
+        if n < 1:
+            raise ValueError("Sampler range must be at least 1")
+        self.n = n
+        if n <= 256:
+            self._bytes: Optional[ByteSampler] = ByteSampler(n)
+            return
+        self._bytes = None
+        # 32-bit draws while they cover the range, else 64-bit
+        self._code = _offset_code(4 if n <= 1 << 32 else 8)
+        space = 1 << (8 * array(self._code).itemsize)
+        self._limit = space - space % n
+
+    def draw(self, count: int) -> List[int]:
+        """count uniform samples"""
+        if self._bytes is not None:
+            return list(self._bytes.draw(count))
+        n = self.n
+        limit = self._limit
+        itemsize = array(self._code).itemsize
+        values: List[int] = []
+        while len(values) < count:
+            # At least half of all draws are accepted (nearly all unless n nears the draw range)
+            need = count - len(values)
+            raw = array(self._code, os.urandom((need + need // 4 + 16) * itemsize))
+            values.extend([x % n for x in raw if x < limit])
+        del values[count:]
+        return values
+
+
+class PassphraseOptions(NamedTuple):
+    """Options for generate_passphrase, hashable so generators can be cached"""
+    wordlist: Optional[str] = None
+    word_count: int = 4
+    separator: str = "-"
+    capitalize: bool = True
+    add_numbers: bool = False
+
+
+class PassphraseGenerator:
+    """Generates batches of passphrases for one set of options"""
+
+    def __init__(self, options: PassphraseOptions):
+        if options.word_count < 1:
+            raise ValueError("A passphrase needs at least one word")
+        self.options = options
+        self.index = load_wordlist(options.wordlist)
+        self._words = IndexSampler(len(self.index))
+        self._numbers = IndexSampler(100)
+
+    @property
+    def entropy_bits(self) -> float:
+        """Entropy of one passphrase in bits; capitalization is predictable and adds none"""
+        bits = self.options.word_count * self.index.bits_per_word
+        if self.options.add_numbers:
+            bits += math.log2(100)
+        return bits
+
+    def generate(self, count: int) -> List[str]:
+        """Generate count passphrases"""
+        word_count, separator, capitalize, add_numbers = self.options[1:]
+        words = self.index.words_at(self._words.draw(count * word_count))
+        if capitalize:
+            words = list(map(str.capitalize, words))
+        if word_count == 1:
+            phrases = words
+        else:
+            phrases = list(map(separator.join, zip(*[iter(words)] * word_count)))
+        if add_numbers:
+            phrases = [f"{phrase}{separator}{number:02d}" for phrase, number in zip(phrases, self._numbers.draw(count))]
+        return phrases
+
+    def report(self) -> Dict[str, float]:
+        return {
+            "wordlist": self.index.source,
+            "words": len(self.index),
+            "bits_per_word": round(self.index.bits_per_word, 2),
+            "entropy_bits": round(self.entropy_bits, 1),
+        }
+
+
+@lru_cache(maxsize=32)
+def passphrase_generator(options: PassphraseOptions) -> PassphraseGenerator:
+    return PassphraseGenerator(options)
+
+
+# Forked workers build their own generators rather than reuse the parent's
+# (password_bulk also drops the buffered bytes of every sampler at fork)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=passphrase_generator.cache_clear)
+
+
+def generate_chunk(options: PassphraseOptions, fmt: str, count: int) -> bytes:
+    """Generate and render one chunk; entry point for process pool workers"""
+    return format_passwords(passphrase_generator(options).generate(count), fmt, key="passphrase")
+
+
+def stream_passphrases(out: BinaryIO,
+                       options: PassphraseOptions,
+                       count: int,
+                       fmt: str = "plain",
+                       workers: Optional[int] = None,
+                       chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Write count passphrases to a binary stream, generated in parallel
+    chunks with constant memory (see password_bulk.stream_chunks)
+
+    Returns:
+        Number of passphrases written
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    # Fail here rather than in every worker if the list is unusable; not
+    # cached, so workers forked below do not inherit the generator
+    PassphraseGenerator(options)
+    return stream_chunks(out, generate_chunk, (options, fmt), count, workers, chunk_size)
+
+
+def main():
+    """Command line interface for building and inspecting wordlist indexes"""
+    parser = argparse.ArgumentParser(description="Build or inspect a passphrase wordlist index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Build an index from a wordlist")
+    build.add_argument("source", help="Wordlist, one word per line (EFF dice numbers are ignored)")
+    build.add_argument("output", help="Index file to write")
+
+    info = commands.add_parser("info", help="Show a wordlist's size and entropy")
+    info.add_argument("wordlist", help="Index file or plain wordlist")
+    info.add_argument("-w", "--words", type=int, default=4,
+                     help="Words per passphrase for the entropy figure (default: 4)")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        count = build_index(args.source, args.output)
+        size_mb = os.path.getsize(args.output) / 1e6
+        print(f"✅ Indexed {count:,} words into {args.output} ({size_mb:.2f} MB) in {time.perf_counter() - start:.1f}s")
+        return
+
+    index = load_wordlist(args.wordlist)
+    print(f"Words: {len(index):,}")
+    print(f"Entropy per word: {index.bits_per_word:.2f} bits")
+    print(f"Entropy of {args.words} words: {args.words * index.bits_per_word:.1f} bits")
+
+
+if __name__ == "__main__":
+    main()